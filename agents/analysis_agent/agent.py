@@ -3,113 +3,268 @@ Analysis Agent for financial data analysis.
 """
 import os
 import logging
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Callable
 import json
+import time
+import hashlib
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from dataclasses import dataclass
+from collections import OrderedDict
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; without it the kernels below run as plain NumPy
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Trailing windows for the simple moving averages reported in stock stats
+SMA_WINDOWS = (5, 20)
+
+# Labels indexed by _sign(): 0 = below, 1 = within, 2 = above the threshold
+DIRECTION_LABELS = ("down", "flat", "up")
+TREND_LABELS = ("bearish", "neutral", "bullish")
+EARNINGS_RESULT_LABELS = ("miss", "meet", "beat")
+
+def _sign(value: float, threshold: float = 0.0) -> int:
+    """Classify value against +/-threshold as 0 (below), 1 (within) or 2 (above)."""
+    return int(value > threshold) - int(value < -threshold) + 1
+
+# Size and lifetime (seconds) of the sub-analysis cache used by market briefs
+BRIEF_CACHE_SIZE = 32
+BRIEF_CACHE_TTL = 300
+
+def _hash_input(data: Dict[str, Any]) -> str:
+    """Stable content hash of an analysis input payload."""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+@dataclass
+class StockArrays:
+    """Column-oriented view of a stock payload with typed price arrays."""
+    symbol: str
+    latest_price: Optional[float]
+    change_percent: Optional[float]
+    close: np.ndarray
+
+def _to_stock_arrays(stock_data: Dict[str, Any]) -> StockArrays:
+    """
+    Parse a stock payload from the API Agent into a StockArrays.
+    
+    The history is parsed once and the close prices are extracted into a
+    contiguous float64 array with missing values removed.
+    
+    Args:
+        stock_data: Stock data from API Agent
+        
+    Returns:
+        StockArrays for the payload
+    """
+    history = stock_data.get("history", [])
+    
+    if isinstance(history, list) and len(history) < 2:
+        # Empty or single-quote history: nothing beyond basic stats can be
+        # computed, so skip DataFrame construction entirely
+        close_prices = np.array([row.get('Close', np.nan) for row in history], dtype=np.float64)
+    else:
+        # Convert history to DataFrame if it's a list
+        if isinstance(history, list):
+            history_df = pd.DataFrame(history)
+        else:
+            # If it's already a DataFrame, use it as is
+            history_df = history
+        
+        if not history_df.empty and 'Close' in history_df.columns:
+            close_prices = history_df['Close'].to_numpy(dtype=np.float64, copy=False)
+        else:
+            close_prices = np.empty(0, dtype=np.float64)
+    
+    close_prices = close_prices[~np.isnan(close_prices)]
+    
+    return StockArrays(
+        symbol=stock_data.get("symbol", ""),
+        latest_price=stock_data.get("latest_price"),
+        change_percent=stock_data.get("change_percent"),
+        close=close_prices
+    )
+
+def _top_k_indices(values: np.ndarray, k: int, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Indices of the k largest values, ordered from largest to smallest.
+    
+    Ties keep their input order, matching a stable descending sort.
+    
+    Args:
+        values: 1-D array of values to rank
+        k: Number of indices to return
+        candidates: Optional subset of indices to select from
+        
+    Returns:
+        Array of at most k indices into values
+    """
+    if candidates is None:
+        candidates = np.arange(values.size)
+    
+    return candidates[np.argsort(-values[candidates], kind="stable")[:k]]
+
+def _bottom_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k smallest values: the last k of a stable descending sort."""
+    order = np.argsort(-values, kind="stable")
+    return order[order.size - min(k, order.size):]
+
+@njit(cache=True, nogil=True)
+def _sample_std(values: np.ndarray) -> float:
+    """Standard deviation with ddof=1, matching pandas' default."""
+    n = values.size
+    if n < 2:
+        return np.nan
+    mean = values.mean()
+    return np.sqrt(((values - mean) ** 2).sum() / (n - 1))
+
+@njit(cache=True, nogil=True)
+def _stats_kernel(close_prices: np.ndarray):
+    """
+    Compute the numeric core of a stock analysis in one compiled call.
+    
+    Args:
+        close_prices: Non-empty float64 array of closing prices
+        
+    Returns:
+        Tuple of (mean, median, std, min, max, volatility percent)
+    """
+    volatility = np.nan
+    if close_prices.size > 1:
+        # Zero prices produce inf/NaN returns; leave them out of the volatility
+        pct_changes = np.diff(close_prices) / close_prices[:-1]
+        pct_changes = pct_changes[np.isfinite(pct_changes)]
+        volatility = _sample_std(pct_changes) * 100  # Convert to percentage
+    
+    return (close_prices.mean(),
+            np.median(close_prices),
+            _sample_std(close_prices),
+            close_prices.min(),
+            close_prices.max(),
+            volatility)
+
+def _batch_stats(close_matrix: np.ndarray) -> List[tuple]:
+    """
+    Row-wise equivalent of _stats_kernel for equal-length price histories.
+    
+    Reducing along the symbol axis of a single 2-D array replaces one kernel
+    call per symbol with a handful of vectorized NumPy reductions.
+    
+    Args:
+        close_matrix: Float64 array of shape (n_symbols, n_days), n_days >= 1
+        
+    Returns:
+        List with one (mean, median, std, min, max, volatility) tuple per row
+    """
+    n_symbols, n_days = close_matrix.shape
+    volatilities = np.full(n_symbols, np.nan)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stds = close_matrix.std(axis=1, ddof=1) if n_days > 1 else np.full(n_symbols, np.nan)
+        
+        if n_days > 1:
+            pct_changes = np.diff(close_matrix, axis=1) / close_matrix[:, :-1]
+            finite = np.isfinite(pct_changes)
+            
+            # Zero prices produce inf/NaN returns; leave them out of the volatility
+            if finite.all():
+                volatilities = pct_changes.std(axis=1, ddof=1) * 100
+            else:
+                for row in range(n_symbols):
+                    volatilities[row] = _sample_std(pct_changes[row][finite[row]]) * 100
+    
+    return list(zip(close_matrix.mean(axis=1),
+                    np.median(close_matrix, axis=1),
+                    stds,
+                    close_matrix.min(axis=1),
+                    close_matrix.max(axis=1),
+                    volatilities))
+
+@lru_cache(maxsize=256)
+def _cached_stats(close_bytes: bytes):
+    """
+    Memoized wrapper around _stats_kernel.
+    
+    The same price history is often analyzed several times per session, so
+    results are keyed on the raw float64 bytes of the close series.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _stats_kernel(np.frombuffer(close_bytes, dtype=np.float64))
+
 class AnalysisAgent:
     """Agent for analyzing financial data."""
     
     def __init__(self):
         """Initialize the Analysis Agent."""
-        pass
+        # Sub-analysis results reused across market briefs, oldest first
+        self._brief_cache = OrderedDict()
     
-    def analyze_stock_data(self, stock_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _cached_analysis(self, analyze: Callable[[Dict[str, Any]], Dict[str, Any]],
+                         data: Dict[str, Any], force: bool = False) -> Dict[str, Any]:
+        """
+        Run a sub-analysis, reusing a recent result for identical input.
+        
+        Args:
+            analyze: Bound analyze_* method to run
+            data: Input payload for the analysis
+            force: Recompute even if a cached result exists
+            
+        Returns:
+            Analysis result
+        """
+        key = (analyze.__name__, _hash_input(data))
+        now = time.monotonic()
+        
+        if not force and key in self._brief_cache:
+            timestamp, result = self._brief_cache[key]
+            if now - timestamp < BRIEF_CACHE_TTL:
+                self._brief_cache.move_to_end(key)
+                return result
+        
+        result = analyze(data)
+        
+        # Only keep successful analyses so transient failures are retried
+        if result.get("success", False):
+            self._brief_cache[key] = (now, result)
+            self._brief_cache.move_to_end(key)
+            while len(self._brief_cache) > BRIEF_CACHE_SIZE:
+                self._brief_cache.popitem(last=False)
+        
+        return result
+    
+    def analyze_stock_data(self, stock_data: Union[Dict[str, Any], StockArrays]) -> Dict[str, Any]:
         """
         Analyze stock price data.
         
         Args:
-            stock_data: Stock data from API Agent
+            stock_data: Stock data from API Agent, or a StockArrays already
+                built from it
             
         Returns:
             Dictionary with analysis results
         """
         try:
-            if not stock_data.get("success", False):
-                return {"success": False, "error": "Invalid stock data"}
-            
-            symbol = stock_data.get("symbol", "")
-            latest_price = stock_data.get("latest_price")
-            change_percent = stock_data.get("change_percent")
-            history = stock_data.get("history", [])
-            
-            # Convert history to DataFrame if it's a list
-            if isinstance(history, list):
-                history_df = pd.DataFrame(history)
+            if isinstance(stock_data, StockArrays):
+                arrays = stock_data
             else:
-                # If it's already a DataFrame, use it as is
-                history_df = history
-            
-            # Basic statistics
-            analysis = {
-                "symbol": symbol,
-                "latest_price": latest_price,
-                "change_percent": change_percent,
-                "stats": {}
-            }
-            
-            # Check if we have enough historical data
-            if not history_df.empty and 'Close' in history_df.columns:
-                # Calculate basic statistics
-                close_prices = history_df['Close']
-                analysis["stats"]["mean"] = float(close_prices.mean())
-                analysis["stats"]["median"] = float(close_prices.median())
-                analysis["stats"]["std"] = float(close_prices.std())
-                analysis["stats"]["min"] = float(close_prices.min())
-                analysis["stats"]["max"] = float(close_prices.max())
-                
-                # Calculate price movement
-                if len(close_prices) > 1:
-                    first_price = close_prices.iloc[0]
-                    last_price = close_prices.iloc[-1]
-                    price_change = last_price - first_price
-                    price_change_percent = (price_change / first_price) * 100
-                    
-                    analysis["movement"] = {
-                        "price_change": float(price_change),
-                        "price_change_percent": float(price_change_percent),
-                        "direction": "up" if price_change > 0 else "down" if price_change < 0 else "flat"
-                    }
-                
-                # Calculate simple moving averages if we have enough data
-                if len(close_prices) >= 5:
-                    analysis["stats"]["sma_5"] = float(close_prices.rolling(window=5).mean().iloc[-1])
+                if not stock_data.get("success", False):
+                    return {"success": False, "error": "Invalid stock data"}
                 
-                if len(close_prices) >= 20:
-                    analysis["stats"]["sma_20"] = float(close_prices.rolling(window=20).mean().iloc[-1])
-                
-                # Calculate volatility (standard deviation of percent changes)
-                if len(close_prices) > 1:
-                    pct_changes = close_prices.pct_change().dropna()
-                    volatility = pct_changes.std() * 100  # Convert to percentage
-                    analysis["stats"]["volatility"] = float(volatility)
-                
-                # Determine price trend
-                if 'sma_5' in analysis["stats"] and 'sma_20' in analysis["stats"]:
-                    sma_5 = analysis["stats"]["sma_5"]
-                    sma_20 = analysis["stats"]["sma_20"]
-                    
-                    if sma_5 > sma_20:
-                        analysis["trend"] = "bullish"
-                    elif sma_5 < sma_20:
-                        analysis["trend"] = "bearish"
-                    else:
-                        analysis["trend"] = "neutral"
-                else:
-                    # Simple trend based on recent movement
-                    if "movement" in analysis:
-                        if analysis["movement"]["price_change_percent"] > 1.0:
-                            analysis["trend"] = "bullish"
-                        elif analysis["movement"]["price_change_percent"] < -1.0:
-                            analysis["trend"] = "bearish"
-                        else:
-                            analysis["trend"] = "neutral"
+                arrays = _to_stock_arrays(stock_data)
+            
+            analysis = self._build_stock_analysis(arrays)
             
             return {
                 "success": True,
@@ -117,9 +272,79 @@ class AnalysisAgent:
             }
             
         except Exception as e:
-            logger.error(f"Error analyzing stock data: {e}")
+            logger.error("Error analyzing stock data: %s", e)
             return {"success": False, "error": str(e)}
     
+    def _build_stock_analysis(self, arrays: StockArrays, stats: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        Build the analysis dictionary for a single stock.
+        
+        Args:
+            arrays: Parsed stock payload
+            stats: Precomputed _stats_kernel output for arrays.close, if any
+            
+        Returns:
+            Analysis dictionary
+        """
+        close_prices = arrays.close
+        
+        # Basic statistics
+        analysis = {
+            "symbol": arrays.symbol,
+            "latest_price": arrays.latest_price,
+            "change_percent": arrays.change_percent,
+            "stats": {}
+        }
+        
+        # Check if we have enough historical data
+        if close_prices.size:
+            # Calculate basic statistics
+            if stats is None:
+                stats = _cached_stats(close_prices.tobytes())
+            mean, median, std, min_price, max_price, volatility = stats
+            analysis["stats"]["mean"] = float(mean)
+            analysis["stats"]["median"] = float(median)
+            analysis["stats"]["std"] = float(std)
+            analysis["stats"]["min"] = float(min_price)
+            analysis["stats"]["max"] = float(max_price)
+            
+            # Calculate price movement
+            if len(close_prices) > 1:
+                first_price = close_prices[0]
+                last_price = close_prices[-1]
+                price_change = last_price - first_price
+                price_change_percent = (price_change / first_price) * 100
+                
+                analysis["movement"] = {
+                    "price_change": float(price_change),
+                    "price_change_percent": float(price_change_percent),
+                    "direction": DIRECTION_LABELS[_sign(price_change)]
+                }
+            
+            # Calculate simple moving averages if we have enough data. Only the
+            # latest value is reported, so average the trailing window directly
+            # rather than building a full rolling series.
+            for window in SMA_WINDOWS:
+                if len(close_prices) >= window:
+                    analysis["stats"][f"sma_{window}"] = float(close_prices[-window:].mean())
+            
+            # Volatility (standard deviation of percent changes) comes with the stats
+            if len(close_prices) > 1:
+                analysis["stats"]["volatility"] = float(volatility)
+            
+            # Determine price trend
+            if 'sma_5' in analysis["stats"] and 'sma_20' in analysis["stats"]:
+                sma_5 = analysis["stats"]["sma_5"]
+                sma_20 = analysis["stats"]["sma_20"]
+                
+                analysis["trend"] = TREND_LABELS[_sign(sma_5 - sma_20)]
+            else:
+                # Simple trend based on recent movement
+                if "movement" in analysis:
+                    analysis["trend"] = TREND_LABELS[_sign(analysis["movement"]["price_change_percent"], 1.0)]
+        
+        return analysis
+    
     def analyze_multiple_stocks(self, stocks_data: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
         """
         Analyze multiple stocks data.
@@ -133,28 +358,65 @@ class AnalysisAgent:
         try:
             results = {}
             
-            for symbol, data in stocks_data.items():
-                if data.get("success", False):
-                    analysis = self.analyze_stock_data(data)
-                    if analysis["success"]:
-                        results[symbol] = analysis["analysis"]
+            # Parse each history into arrays once up front
+            valid_stocks = [(symbol, _to_stock_arrays(data)) for symbol, data in stocks_data.items()
+                            if data.get("success", False)]
+            analyses = [None] * len(valid_stocks)
+            
+            # Histories of equal length (e.g. the same date range) are stacked
+            # into one 2-D array and reduced across the symbol axis together
+            rows_by_length = {}
+            for i, (_, arrays) in enumerate(valid_stocks):
+                if arrays.close.size:
+                    rows_by_length.setdefault(arrays.close.size, []).append(i)
+            
+            for rows in rows_by_length.values():
+                if len(rows) > 1:
+                    close_matrix = np.vstack([valid_stocks[i][1].close for i in rows])
+                    for i, stats in zip(rows, _batch_stats(close_matrix)):
+                        analyses[i] = {
+                            "success": True,
+                            "analysis": self._build_stock_analysis(valid_stocks[i][1], stats)
+                        }
+            
+            # The remaining symbols are independent and the numeric kernel
+            # releases the GIL, so analyze them concurrently
+            pending = [i for i, analysis in enumerate(analyses) if analysis is None]
+            
+            if pending:
+                max_workers = min(len(pending), os.cpu_count() or 1)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    for i, analysis in zip(pending, executor.map(lambda i: self.analyze_stock_data(valid_stocks[i][1]), pending)):
+                        analyses[i] = analysis
+            
+            for (symbol, _), analysis in zip(valid_stocks, analyses):
+                if analysis["success"]:
+                    results[symbol] = analysis["analysis"]
             
             # Calculate comparative metrics
             if len(results) > 1:
                 # Find best and worst performers
-                performances = []
+                symbols = []
+                change_percents = []
                 
                 for symbol, analysis in results.items():
                     if "change_percent" in analysis:
-                        performances.append((symbol, analysis["change_percent"]))
-                
-                performances.sort(key=lambda x: x[1], reverse=True)
+                        symbols.append(symbol)
+                        change_percents.append(analysis["change_percent"])
                 
-                best_performer = performances[0][0] if performances else None
-                worst_performer = performances[-1][0] if performances else None
+                performances = np.array(change_percents, dtype=np.float64)
                 
-                # Calculate average performance
-                avg_performance = sum(p[1] for p in performances) / len(performances) if performances else 0
+                if performances.size:
+                    best_performer = symbols[int(performances.argmax())]
+                    # On ties the worst performer is the last one listed
+                    worst_performer = symbols[performances.size - 1 - int(performances[::-1].argmin())]
+                    
+                    # Calculate average performance
+                    avg_performance = float(performances.mean())
+                else:
+                    best_performer = None
+                    worst_performer = None
+                    avg_performance = 0
                 
                 comparative = {
                     "best_performer": {
@@ -180,7 +442,7 @@ class AnalysisAgent:
             }
             
         except Exception as e:
-            logger.error(f"Error analyzing multiple stocks: {e}")
+            logger.error("Error analyzing multiple stocks: %s", e)
             return {"success": False, "error": str(e)}
     
     def analyze_earnings_data(self, earnings_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -208,42 +470,59 @@ class AnalysisAgent:
             }
             
             # Check if we have earnings history
-            if earnings_history:
-                # Convert to DataFrame for easier analysis
+            if len(earnings_history):
+                reported_eps = estimated_eps = None
+                
                 if isinstance(earnings_history, list):
-                    history_df = pd.DataFrame(earnings_history)
-                else:
-                    history_df = earnings_history
+                    # Only two columns are needed, so read them straight from the
+                    # records; a DataFrame costs more than the arithmetic here
+                    if any('Reported EPS' in r for r in earnings_history) and \
+                       any('Estimated EPS' in r for r in earnings_history):
+                        reported_eps = np.array([r.get('Reported EPS', np.nan) for r in earnings_history],
+                                                dtype=np.float64)
+                        estimated_eps = np.array([r.get('Estimated EPS', np.nan) for r in earnings_history],
+                                                 dtype=np.float64)
+                elif 'Reported EPS' in earnings_history.columns and 'Estimated EPS' in earnings_history.columns:
+                    # Already a DataFrame
+                    reported_eps = earnings_history['Reported EPS'].to_numpy(dtype=np.float64)
+                    estimated_eps = earnings_history['Estimated EPS'].to_numpy(dtype=np.float64)
                 
                 # Calculate surprise metrics if we have the right columns
-                if not history_df.empty and 'Reported EPS' in history_df.columns and 'Estimated EPS' in history_df.columns:
-                    # Calculate surprise percentages
-                    history_df['Surprise Percent'] = (history_df['Reported EPS'] - history_df['Estimated EPS']) / \
-                                                    history_df['Estimated EPS'].abs() * 100
+                if reported_eps is not None:
+                    # Calculate surprise percentages in one pass over the EPS arrays
+                    surprise_percent = (reported_eps - estimated_eps) / np.abs(estimated_eps) * 100
+                    
+                    # Missing values are neither beats, meets nor misses and are
+                    # skipped in the average, like pandas does
+                    valid_surprises = surprise_percent[~np.isnan(surprise_percent)]
                     
-                    # Count beats, meets, misses
-                    beats = len(history_df[history_df['Surprise Percent'] > 1.0])
-                    meets = len(history_df[(history_df['Surprise Percent'] <= 1.0) & (history_df['Surprise Percent'] >= -1.0)])
-                    misses = len(history_df[history_df['Surprise Percent'] < -1.0])
+                    # Count misses, meets, beats in one pass: classify each quarter
+                    # as 0/1/2 and histogram the classes
+                    classes = (valid_surprises > 1.0).astype(np.intp) - (valid_surprises < -1.0) + 1
+                    misses, meets, beats = (int(c) for c in np.bincount(classes, minlength=3))
                     
                     # Calculate average surprise
-                    avg_surprise = history_df['Surprise Percent'].mean()
+                    avg_surprise = valid_surprises.mean() if valid_surprises.size else np.nan
+                    
+                    # Latest quarter's surprise, with a missing value treated as 0
+                    has_latest = surprise_percent.size > 0
+                    latest_surprise = float(surprise_percent[0]) if has_latest else 0.0
+                    if np.isnan(latest_surprise):
+                        latest_surprise = 0.0
                     
                     analysis["earnings_analysis"] = {
                         "beats": beats,
                         "meets": meets,
                         "misses": misses,
-                        "beat_ratio": beats / len(history_df) if len(history_df) > 0 else 0,
-                        "average_surprise_percent": float(avg_surprise) if not pd.isna(avg_surprise) else 0,
-                        "latest_result": "beat" if history_df['Surprise Percent'].iloc[0] > 1.0 else
-                                         "miss" if history_df['Surprise Percent'].iloc[0] < -1.0 else "meet"
-                                         if len(history_df) > 0 else "unknown"
+                        "beat_ratio": beats / surprise_percent.size if has_latest else 0,
+                        "average_surprise_percent": float(avg_surprise) if not np.isnan(avg_surprise) else 0,
+                        "latest_result": EARNINGS_RESULT_LABELS[_sign(latest_surprise, 1.0)]
+                                         if has_latest else "unknown"
                     }
                     
                     # Get latest surprise percentage
-                    if len(history_df) > 0:
-                        analysis["latest_surprise_percent"] = float(history_df['Surprise Percent'].iloc[0]) \
-                                                             if not pd.isna(history_df['Surprise Percent'].iloc[0]) else 0
+                    if has_latest:
+                        analysis["latest_surprise_percent"] = latest_surprise
             
             return {
                 "success": True,
@@ -251,7 +530,7 @@ class AnalysisAgent:
             }
             
         except Exception as e:
-            logger.error(f"Error analyzing earnings data: {e}")
+            logger.error("Error analyzing earnings data: %s", e)
             return {"success": False, "error": str(e)}
     
     def analyze_sector_performance(self, sector_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -278,21 +557,28 @@ class AnalysisAgent:
                     performance = data["performance"]
                     sector_performances.append((sector, performance))
             
-            # Sort sectors by performance
-            sector_performances.sort(key=lambda x: x[1], reverse=True)
+            performances = np.array([p for _, p in sector_performances], dtype=np.float64)
             
             # Calculate average performance
-            avg_performance = sum(p[1] for s, p in sector_performances) / len(sector_performances) if sector_performances else 0
+            avg_performance = float(performances.mean()) if sector_performances else 0
+            
+            # Select the top/bottom sectors without sorting the whole universe
+            top_idx = _top_k_indices(performances, 3)
+            bottom_idx = _bottom_k_indices(performances, 3)
+            
+            # Group sectors by performance, best first within each group
+            outperforming_mask = performances > avg_performance
+            outperforming_idx = _top_k_indices(performances, performances.size, np.flatnonzero(outperforming_mask))
+            underperforming_idx = _top_k_indices(performances, performances.size, np.flatnonzero(~outperforming_mask))
             
-            # Group sectors by performance
-            outperforming = [(s, p) for s, p in sector_performances if p > avg_performance]
-            underperforming = [(s, p) for s, p in sector_performances if p <= avg_performance]
+            outperforming = [sector_performances[i] for i in outperforming_idx]
+            underperforming = [sector_performances[i] for i in underperforming_idx]
             
             return {
                 "success": True,
                 "analysis": {
-                    "top_sectors": sector_performances[:3] if len(sector_performances) >= 3 else sector_performances,
-                    "bottom_sectors": sector_performances[-3:] if len(sector_performances) >= 3 else sector_performances,
+                    "top_sectors": [sector_performances[i] for i in top_idx],
+                    "bottom_sectors": [sector_performances[i] for i in bottom_idx],
                     "average_performance": avg_performance,
                     "outperforming_sectors": outperforming,
                     "underperforming_sectors": underperforming
@@ -300,7 +586,7 @@ class AnalysisAgent:
             }
             
         except Exception as e:
-            logger.error(f"Error analyzing sector performance: {e}")
+            logger.error("Error analyzing sector performance: %s", e)
             return {"success": False, "error": str(e)}
     
     def analyze_market_sentiment(self, sentiment_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -322,13 +608,15 @@ class AnalysisAgent:
             factors = sentiment_data.get("factors", [])
             indices = sentiment_data.get("indices", {})
             
-            # Analyze the factors affecting sentiment
-            positive_factors = [f for f in factors if f.get("impact") == "positive"]
-            negative_factors = [f for f in factors if f.get("impact") == "negative"]
+            # Analyze the factors affecting sentiment as parallel impact/score arrays
+            impacts = np.array([f.get("impact") for f in factors], dtype=object)
+            scores = np.array([f.get("score", 0) for f in factors], dtype=np.float64)
+            positive_idx = np.flatnonzero(impacts == "positive")
+            negative_idx = np.flatnonzero(impacts == "negative")
             
-            # Sort factors by score
-            positive_factors.sort(key=lambda x: x.get("score", 0), reverse=True)
-            negative_factors.sort(key=lambda x: abs(x.get("score", 0)), reverse=True)
+            # Pick the strongest factors by score without sorting every factor
+            top_positive_factors = [factors[i] for i in _top_k_indices(scores, 3, positive_idx)]
+            top_negative_factors = [factors[i] for i in _top_k_indices(np.abs(scores), 3, negative_idx)]
             
             # Analyze index performances
             index_performances = []
@@ -343,25 +631,26 @@ class AnalysisAgent:
                     })
             
             # Sort indices by performance
-            index_performances.sort(key=lambda x: x.get("change_percent", 0), reverse=True)
+            index_changes = np.array([p["change_percent"] for p in index_performances], dtype=np.float64)
+            index_performances = [index_performances[i] for i in np.argsort(-index_changes, kind="stable")]
             
             return {
                 "success": True,
                 "analysis": {
                     "sentiment_score": sentiment_score,
                     "sentiment_label": sentiment_label,
-                    "top_positive_factors": positive_factors[:3] if len(positive_factors) >= 3 else positive_factors,
-                    "top_negative_factors": negative_factors[:3] if len(negative_factors) >= 3 else negative_factors,
+                    "top_positive_factors": top_positive_factors,
+                    "top_negative_factors": top_negative_factors,
                     "index_performances": index_performances,
                     "factor_count": {
-                        "positive": len(positive_factors),
-                        "negative": len(negative_factors)
+                        "positive": int(positive_idx.size),
+                        "negative": int(negative_idx.size)
                     }
                 }
             }
             
         except Exception as e:
-            logger.error(f"Error analyzing market sentiment: {e}")
+            logger.error("Error analyzing market sentiment: %s", e)
             return {"success": False, "error": str(e)}
     
     def analyze_asia_tech_exposure(self, exposure_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -402,8 +691,11 @@ class AnalysisAgent:
                         "change_percent": data.get("change_percent")
                     })
             
-            # Sort stocks by performance
-            stock_performances.sort(key=lambda x: x.get("change_percent", 0), reverse=True)
+            # Rank the best and worst performers without sorting every stock
+            change_percents = np.array([p.get("change_percent", 0) for p in stock_performances], dtype=np.float64)
+            top_performers = [stock_performances[i] for i in _top_k_indices(change_percents, 3)]
+            bottom_performers = [stock_performances[i] for i in _bottom_k_indices(change_percents, 3)] \
+                                if len(stock_performances) >= 3 else []
             
             # Earnings surprises analysis
             positive_surprises = []
@@ -437,8 +729,8 @@ class AnalysisAgent:
                         "direction": "increased" if allocation_change > 0 else "decreased" if allocation_change < 0 else "unchanged"
                     },
                     "stock_performance": {
-                        "top_performers": stock_performances[:3] if len(stock_performances) >= 3 else stock_performances,
-                        "bottom_performers": stock_performances[-3:] if len(stock_performances) >= 3 else [],
+                        "top_performers": top_performers,
+                        "bottom_performers": bottom_performers,
                         "average_change": avg_change
                     },
                     "earnings_surprises": {
@@ -454,7 +746,7 @@ class AnalysisAgent:
             }
             
         except Exception as e:
-            logger.error(f"Error analyzing Asia tech exposure: {e}")
+            logger.error("Error analyzing Asia tech exposure: %s", e)
             return {"success": False, "error": str(e)}
     
     def analyze_yield_data(self, yield_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -520,14 +812,15 @@ class AnalysisAgent:
             }
             
         except Exception as e:
-            logger.error(f"Error analyzing yield data: {e}")
+            logger.error("Error analyzing yield data: %s", e)
             return {"success": False, "error": str(e)}
     
     def analyze_market_brief(self, 
                            asia_tech_data: Dict[str, Any],
                            earnings_data: Dict[str, Any],
                            market_sentiment: Dict[str, Any],
-                           yield_data: Dict[str, Any]) -> Dict[str, Any]:
+                           yield_data: Dict[str, Any],
+                           force: bool = False) -> Dict[str, Any]:
         """
         Generate a comprehensive market brief from multiple data sources.
         
@@ -536,39 +829,43 @@ class AnalysisAgent:
             earnings_data: Earnings data for key stocks
             market_sentiment: Overall market sentiment
             yield_data: Yield data
+            force: Recompute sub-analyses instead of reusing cached results
             
         Returns:
             Dictionary with comprehensive analysis
         """
         try:
-            # Analyze individual components
-            asia_tech_analysis = self.analyze_asia_tech_exposure(asia_tech_data)
-            market_sentiment_analysis = self.analyze_market_sentiment(market_sentiment)
-            yield_analysis = self.analyze_yield_data(yield_data)
-            
-            # Check if analyses were successful
-            if not all([asia_tech_analysis.get("success", False),
-                       market_sentiment_analysis.get("success", False),
-                       yield_analysis.get("success", False)]):
+            # Analyze individual components, reusing recent results for
+            # unchanged inputs
+            asia_tech_analysis = self._cached_analysis(self.analyze_asia_tech_exposure, asia_tech_data, force)
+            market_sentiment_analysis = self._cached_analysis(self.analyze_market_sentiment, market_sentiment, force)
+            yield_analysis = self._cached_analysis(self.analyze_yield_data, yield_data, force)
+            
+            # Check if analyses were successful (every analyze_* result carries "success")
+            if not (asia_tech_analysis["success"] and
+                    market_sentiment_analysis["success"] and
+                    yield_analysis["success"]):
                 return {"success": False, "error": "One or more analyses failed"}
             
             # Extract key metrics
             asia_tech = asia_tech_analysis["analysis"]
             sentiment = market_sentiment_analysis["analysis"]
             yields = yield_analysis["analysis"]
+            allocation = asia_tech["allocation"]
+            regional_sentiment = asia_tech["sentiment"]
             
             # Build comprehensive brief
             brief = {
                 "asia_tech_allocation": {
-                    "current": asia_tech["allocation"]["current"],
-                    "previous": asia_tech["allocation"]["previous"],
-                    "change": asia_tech["allocation"]["change"],
-                    "change_percent": asia_tech["allocation"]["change_percent"]
+                    "current": allocation["current"],
+                    "previous": allocation["previous"],
+                    "change": allocation["change"],
+                    "change_percent": allocation["change_percent"]
                 },
                 "earnings_surprises": asia_tech["earnings_surprises"],
                 "regional_sentiment": {
-                    "label": asia_tech["sentiment"]["label"],
-                    "detail": asia_tech["sentiment"]["detail"]
+                    "label": regional_sentiment["label"],
+                    "detail": regional_sentiment["detail"]
                 },
                 "market_sentiment": {
                     "label": sentiment["sentiment_label"],
@@ -588,5 +885,5 @@ class AnalysisAgent:
             }
             
         except Exception as e:
-            logger.error(f"Error generating market brief: {e}")
+            logger.error("Error generating market brief: %s", e)
             return {"success": False, "error": str(e)}
@@ -4,6 +4,7 @@ FastAPI service for the Analysis Agent.
 import os
 from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -17,7 +18,8 @@ analysis_agent = AnalysisAgent()
 
 # Create FastAPI app
 app = FastAPI(title="Analysis Agent Service", 
-              description="Financial data analysis agent")
+              description="Financial data analysis agent",
+              default_response_class=ORJSONResponse)
 
 # Define request and response models
 class StockDataRequest(BaseModel):
@@ -46,12 +48,19 @@ class MarketBriefRequest(BaseModel):
     earnings_data: Dict[str, Any]
     market_sentiment: Dict[str, Any]
     yield_data: Dict[str, Any]
+    force: bool = False
 
 class ApiResponse(BaseModel):
     success: bool
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+def _to_api_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap an agent result in the ApiResponse envelope."""
+    if result["success"]:
+        return {"success": True, "data": result}
+    return {"success": False, "error": result.get("error", "Unknown error")}
+
 @app.get("/")
 async def read_root():
     """Health check endpoint."""
@@ -61,64 +70,43 @@ async def read_root():
 async def analyze_stock(request: StockDataRequest):
     """Analyze stock data."""
     result = analysis_agent.analyze_stock_data(request.stock_data)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    return _to_api_response(result)
 
 @app.post("/stocks", response_model=ApiResponse)
 async def analyze_stocks(request: StocksDataRequest):
     """Analyze multiple stocks data."""
     result = analysis_agent.analyze_multiple_stocks(request.stocks_data)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    return _to_api_response(result)
 
 @app.post("/earnings", response_model=ApiResponse)
 async def analyze_earnings(request: EarningsDataRequest):
     """Analyze earnings data."""
     result = analysis_agent.analyze_earnings_data(request.earnings_data)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    return _to_api_response(result)
 
 @app.post("/sector", response_model=ApiResponse)
 async def analyze_sector(request: SectorDataRequest):
     """Analyze sector performance data."""
     result = analysis_agent.analyze_sector_performance(request.sector_data)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    return _to_api_response(result)
 
 @app.post("/sentiment", response_model=ApiResponse)
 async def analyze_sentiment(request: SentimentDataRequest):
     """Analyze market sentiment data."""
     result = analysis_agent.analyze_market_sentiment(request.sentiment_data)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    return _to_api_response(result)
 
 @app.post("/asia-tech", response_model=ApiResponse)
 async def analyze_asia_tech(request: AsiaDataRequest):
     """Analyze Asia tech exposure data."""
     result = analysis_agent.analyze_asia_tech_exposure(request.exposure_data)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    return _to_api_response(result)
 
 @app.post("/yields", response_model=ApiResponse)
 async def analyze_yields(request: YieldDataRequest):
     """Analyze yield data."""
     result = analysis_agent.analyze_yield_data(request.yield_data)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    return _to_api_response(result)
 
 @app.post("/market-brief", response_model=ApiResponse)
 async def generate_market_brief(request: MarketBriefRequest):
@@ -127,9 +115,14 @@ async def generate_market_brief(request: MarketBriefRequest):
         request.asia_tech_data,
         request.earnings_data,
         request.market_sentiment,
-        request.yield_data
+        request.yield_data,
+        force=request.force
     )
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    return _to_api_response(result)
+
+if __name__ == "__main__":
+    import uvicorn
+    # WEB_CONCURRENCY sets the number of worker processes; uvicorn also reads
+    # it when launched from the command line
+    uvicorn.run("agents.analysis_agent.service:app", host="0.0.0.0", port=8083,
+                workers=int(os.getenv("WEB_CONCURRENCY", "4")))
@@ -2,8 +2,18 @@
 FastAPI service for the API Agent.
 """
 import os
-from typing import List, Dict, Any, Optional
+import time
+import logging
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Dict, Any, Optional, Set, Tuple
+from contextlib import asynccontextmanager
+import anyio
+import orjson
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -12,12 +22,219 @@ from .agent import APIAgent
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Initialize the API Agent
 api_agent = APIAgent(alpha_vantage_key=os.getenv("ALPHAVANTAGE_API_KEY"))
 
+# Market data moves on a seconds-to-minutes timescale, so identical upstream
+# calls within this window are answered from memory
+MARKET_CACHE_TTL_SECONDS = float(os.getenv("MARKET_CACHE_TTL_SECONDS", "60"))
+MARKET_CACHE_SIZE = 512
+
+_market_cache = OrderedDict()
+_market_cache_lock = threading.Lock()
+
+# Optional on-disk cache directory. When set, cached results survive worker
+# restarts and are shared by every worker on the host.
+MARKET_CACHE_DIR = os.getenv("MARKET_CACHE_DIR")
+MARKET_CACHE_DISK_LIMIT = 2 ** 30
+
+_disk_cache = None
+if MARKET_CACHE_DIR:
+    try:
+        from diskcache import Cache, Lock
+        _disk_cache = Cache(MARKET_CACHE_DIR, size_limit=MARKET_CACHE_DISK_LIMIT)
+    except ImportError:
+        logger.warning("MARKET_CACHE_DIR is set but diskcache is not installed; "
+                       "using the in-process cache")
+
+def _cache_get(key: tuple) -> Optional[Dict[str, Any]]:
+    """Return a fresh cached result for key, or None."""
+    if _disk_cache is not None:
+        return _disk_cache.get(key)
+    
+    with _market_cache_lock:
+        entry = _market_cache.get(key)
+        if entry is None:
+            return None
+        
+        timestamp, result = entry
+        if time.monotonic() - timestamp >= MARKET_CACHE_TTL_SECONDS:
+            del _market_cache[key]
+            return None
+        
+        _market_cache.move_to_end(key)
+        return result
+
+def _cache_set(key: tuple, result: Dict[str, Any]) -> None:
+    """Store a successful result, evicting the least recently used entries."""
+    if not result.get("success", False):
+        return
+    
+    if _disk_cache is not None:
+        _disk_cache.set(key, result, expire=MARKET_CACHE_TTL_SECONDS)
+        return
+    
+    with _market_cache_lock:
+        _market_cache[key] = (time.monotonic(), result)
+        _market_cache.move_to_end(key)
+        while len(_market_cache) > MARKET_CACHE_SIZE:
+            _market_cache.popitem(last=False)
+
+def _cached_call(method: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    """
+    Call an API Agent method through the TTL cache.
+    
+    Args:
+        method: Bound APIAgent method
+        *args: Positional arguments, which together with the method name form
+            the cache key
+        
+    Returns:
+        The method's result, possibly from cache
+    """
+    key = (method.__name__,) + args
+    result = _cache_get(key)
+    if result is not None:
+        return result
+    
+    if _disk_cache is not None:
+        # Let one worker fetch while the others wait and reuse its result
+        with Lock(_disk_cache, ("lock",) + key, expire=MARKET_CACHE_TTL_SECONDS):
+            result = _cache_get(key)
+            if result is None:
+                result = method(*args)
+                _cache_set(key, result)
+        return result
+    
+    result = method(*args)
+    _cache_set(key, result)
+    return result
+
+def _get_multiple_stocks_cached(symbols: List[str], period: str) -> Dict[str, Any]:
+    """
+    Fetch several stocks, reusing cached per-symbol results.
+    
+    Entries share keys with single-stock lookups, so overlapping requests
+    only fetch the symbols that are missing or stale.
+    """
+    results = {}
+    missing = []
+    
+    for symbol in symbols:
+        cached = _cache_get(("get_stock_data", symbol, period))
+        if cached is None:
+            missing.append(symbol)
+        else:
+            results[symbol] = cached
+    
+    if missing:
+        fetched = api_agent.get_multiple_stocks(missing, period)
+        for symbol, result in fetched.items():
+            _cache_set(("get_stock_data", symbol, period), result)
+            results[symbol] = result
+    
+    return {symbol: results[symbol] for symbol in symbols if symbol in results}
+
+# Concurrent /stock requests arriving within this window are coalesced into a
+# single multi-stock fetch
+STOCK_BATCH_WINDOW_MS = float(os.getenv("STOCK_BATCH_WINDOW_MS", "25"))
+STOCK_BATCH_SIZE = 32
+
+class StockBatcher:
+    """Coalesce concurrent single-stock lookups into multi-stock fetches."""
+    
+    def __init__(self, window_ms: float, max_batch_size: int):
+        """
+        Initialize the batcher.
+        
+        Args:
+            window_ms: How long to wait for more requests after the first one
+            max_batch_size: Flush immediately once this many requests are queued
+        """
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # The event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def fetch(self, symbol: str, period: str) -> Dict[str, Any]:
+        """
+        Get stock data for one symbol, sharing the upstream call with any
+        other requests for the same period in the current window.
+        """
+        key = ("get_stock_data", symbol, period)
+        if _disk_cache is not None:
+            # diskcache reads hit SQLite, so keep them off the event loop
+            cached = await run_in_threadpool(_cache_get, key)
+        else:
+            cached = _cache_get(key)
+        if cached is not None:
+            return cached
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(period, [])
+        batch.append((symbol, future))
+        
+        if len(batch) >= self.max_batch_size:
+            self._flush(period)
+        elif len(batch) == 1:
+            self._timers[period] = loop.call_later(self.window, self._flush, period)
+        
+        return await future
+    
+    def _flush(self, period: str) -> None:
+        """Dispatch the queued requests for a period."""
+        timer = self._timers.pop(period, None)
+        if timer is not None:
+            timer.cancel()
+        
+        batch = self._pending.pop(period, [])
+        if batch:
+            task = asyncio.ensure_future(self._run(period, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, period: str, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Fetch a batch off the event loop and resolve its waiters."""
+        symbols = list(dict.fromkeys(symbol for symbol, _ in batch))
+        
+        try:
+            if len(symbols) == 1:
+                results = {symbols[0]: await run_in_threadpool(
+                    _cached_call, api_agent.get_stock_data, symbols[0], period)}
+            else:
+                results = await run_in_threadpool(_get_multiple_stocks_cached, symbols, period)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for symbol, future in batch:
+            if not future.done():
+                future.set_result(results.get(symbol, {"success": False,
+                                                       "error": f"No data returned for {symbol}"}))
+
+_stock_batcher = StockBatcher(STOCK_BATCH_WINDOW_MS, STOCK_BATCH_SIZE)
+
+# Size of the threadpool that runs blocking API Agent calls off the event loop
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "64"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the threadpool so concurrent requests fetch in parallel."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    yield
+
 # Create FastAPI app
 app = FastAPI(title="API Agent Service", 
-              description="Financial data API agent for fetching market data")
+              description="Financial data API agent for fetching market data",
+              default_response_class=ORJSONResponse,
+              lifespan=lifespan)
 
 # Define request and response models
 class StockRequest(BaseModel):
@@ -36,6 +253,12 @@ class ApiResponse(BaseModel):
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+def _to_api_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap an agent result in the ApiResponse envelope."""
+    if result["success"]:
+        return {"success": True, "data": result}
+    return {"success": False, "error": result.get("error", "Unknown error")}
+
 @app.get("/")
 async def read_root():
     """Health check endpoint."""
@@ -44,59 +267,70 @@ async def read_root():
 @app.post("/stock", response_model=ApiResponse)
 async def get_stock_data(request: StockRequest):
     """Get stock data for a single symbol."""
-    result = api_agent.get_stock_data(request.symbol, request.period)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await _stock_batcher.fetch(request.symbol, request.period)
+    return _to_api_response(result)
+
+@app.post("/stock/history")
+async def stream_stock_history(request: StockRequest):
+    """
+    Stream a stock's price history as newline-delimited JSON.
+    
+    Each row is written as its own JSON line, so clients can start parsing
+    before long histories have been fully transferred.
+    """
+    result = await run_in_threadpool(_cached_call, api_agent.get_stock_data, request.symbol, request.period)
+    if not result["success"]:
+        return _to_api_response(result)
+    
+    history = result.get("history", [])
+    if not isinstance(history, list):
+        history = history.to_dict(orient="records")
+    
+    def rows():
+        for row in history:
+            yield orjson.dumps(row, default=str, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
 
 @app.post("/stocks", response_model=ApiResponse)
 async def get_multiple_stocks(request: MultipleStockRequest):
     """Get stock data for multiple symbols."""
-    results = api_agent.get_multiple_stocks(request.symbols, request.period)
+    results = await run_in_threadpool(_get_multiple_stocks_cached, request.symbols, request.period)
     return {"success": True, "data": results}
 
 @app.post("/earnings", response_model=ApiResponse)
 async def get_earnings_data(request: EarningsRequest):
     """Get earnings data for a stock."""
-    result = api_agent.get_earnings_data(request.symbol)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await run_in_threadpool(_cached_call, api_agent.get_earnings_data, request.symbol)
+    return _to_api_response(result)
 
 @app.get("/sector-performance", response_model=ApiResponse)
 async def get_sector_performance():
     """Get sector performance data."""
-    result = api_agent.get_sector_performance()
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await run_in_threadpool(_cached_call, api_agent.get_sector_performance)
+    return _to_api_response(result)
 
 @app.get("/market-sentiment", response_model=ApiResponse)
 async def get_market_sentiment():
     """Get overall market sentiment."""
-    result = api_agent.get_market_sentiment()
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await run_in_threadpool(api_agent.get_market_sentiment)
+    return _to_api_response(result)
 
 @app.get("/asia-tech-exposure", response_model=ApiResponse)
 async def get_asia_tech_exposure():
     """Get Asia tech exposure data."""
-    result = api_agent.get_asia_tech_exposure()
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await run_in_threadpool(api_agent.get_asia_tech_exposure)
+    return _to_api_response(result)
 
 @app.get("/yield-data", response_model=ApiResponse)
 async def get_yield_data():
     """Get current yield data."""
-    result = api_agent.get_yield_data()
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await run_in_threadpool(_cached_call, api_agent.get_yield_data)
+    return _to_api_response(result)
+
+if __name__ == "__main__":
+    import uvicorn
+    # WEB_CONCURRENCY sets the number of worker processes; uvicorn also reads
+    # it when launched from the command line
+    uvicorn.run("agents.api_agent.service:app", host="0.0.0.0", port=8080,
+                workers=int(os.getenv("WEB_CONCURRENCY", "4")))
@@ -2,34 +2,375 @@
 Language Agent for natural language generation and understanding.
 """
 import os
+import time
+import hashlib
+import sqlite3
 import logging
-from typing import Dict, List, Any, Optional, Union
+import asyncio
+from collections import OrderedDict
+from contextlib import closing
+from functools import lru_cache
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Any, Optional, Set, Tuple, Union
 import json
 from datetime import datetime
 import agno
-from openai import OpenAI
+import httpx
+import orjson
+from openai import (AsyncOpenAI, APIConnectionError, InternalServerError,
+                    RateLimitError)
+from tenacity import (retry, retry_if_exception_type, stop_after_attempt,
+                      wait_random_exponential)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: str):
+    """Return the tiktoken encoding for a model, or None if unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use, which fails offline
+        logger.warning(f"Could not load tiktoken encoding for {model_name}, estimating tokens: {e}")
+        return None
+
+# Transient OpenAI failures are retried with jittered exponential backoff.
+# APITimeoutError is a subclass of APIConnectionError; 400s are never retried.
+OPENAI_RETRY_ATTEMPTS = 6
+RETRYABLE_OPENAI_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+# Identical low-temperature requests are answered from an in-process cache.
+# Market data moves quickly, so responses expire after a minute by default;
+# earnings figures only change once a quarter.
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = 60
+EARNINGS_SUMMARY_CACHE_TTL = 3600
+RESPONSE_CACHE_MAX_TEMPERATURE = 0.3
+
+# Retrieved context is truncated to this many tokens so that, with the prompt
+# and the 1000-token response, it fits gpt-4's 8k context window
+CONTEXT_TOKEN_BUDGET = 6000
+
+# Concurrent understand_query calls are batched into one request. Each query
+# gets the single-query output budget, and batches are capped so the combined
+# budget stays within a single response.
+QUERY_MAX_TOKENS = 500
+QUERY_BATCH_SIZE = 8
+
+def _dump_json(data: Any) -> str:
+    """Serialize data as indented JSON for a prompt."""
+    return orjson.dumps(data, default=str,
+                        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+def _log_openai_retry(retry_state) -> None:
+    """Log a retried OpenAI call along with its rate limit headers."""
+    error = retry_state.outcome.exception()
+    response = getattr(error, "response", None)
+    headers = response.headers if response is not None else {}
+    logger.warning(
+        "Retrying OpenAI call (attempt %d) in %.1fs after %s: "
+        "retry-after=%s x-ratelimit-remaining-requests=%s x-ratelimit-remaining-tokens=%s",
+        retry_state.attempt_number,
+        retry_state.next_action.sleep,
+        type(error).__name__,
+        headers.get("retry-after"),
+        headers.get("x-ratelimit-remaining-requests"),
+        headers.get("x-ratelimit-remaining-tokens")
+    )
+
+def count_tokens(text: str, model_name: str) -> int:
+    """
+    Count the tokens in a piece of text.
+    
+    Uses tiktoken when installed and otherwise estimates four characters per token.
+    """
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+def truncate_tokens(text: str, max_tokens: int, model_name: str) -> str:
+    """
+    Truncate text to at most max_tokens tokens.
+    
+    Uses tiktoken when installed and otherwise cuts at four characters per token.
+    """
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+class RateLimiter:
+    """Token-bucket limiter for OpenAI requests-per-minute and tokens-per-minute."""
+    
+    def __init__(self, max_requests_per_minute: float, max_tokens_per_minute: float):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            max_requests_per_minute: Request budget per minute
+            max_tokens_per_minute: Token budget per minute
+        """
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self._available_requests = max_requests_per_minute
+        self._available_tokens = max_tokens_per_minute
+        self._last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self) -> None:
+        """Top up both buckets for the time elapsed since the last update."""
+        now = time.monotonic()
+        elapsed_minutes = (now - self._last_update) / 60
+        self._last_update = now
+        
+        self._available_requests = min(self.max_requests_per_minute,
+                                       self._available_requests + elapsed_minutes * self.max_requests_per_minute)
+        self._available_tokens = min(self.max_tokens_per_minute,
+                                     self._available_tokens + elapsed_minutes * self.max_tokens_per_minute)
+    
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait until one request and the given number of tokens are available.
+        
+        Waiters are served in arrival order.
+        
+        Args:
+            tokens: Estimated tokens the request will consume
+        """
+        tokens = min(tokens, self.max_tokens_per_minute)
+        
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._available_requests >= 1 and self._available_tokens >= tokens:
+                    self._available_requests -= 1
+                    self._available_tokens -= tokens
+                    return
+                
+                wait_minutes = max((1 - self._available_requests) / self.max_requests_per_minute,
+                                   (tokens - self._available_tokens) / self.max_tokens_per_minute)
+                await asyncio.sleep(wait_minutes * 60)
+
+class MicroBatcher:
+    """Coalesce concurrent calls made within a short window into one batch call."""
+    
+    def __init__(self, handle_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+                 window_ms: float, max_batch_size: int):
+        """
+        Initialize the batcher.
+        
+        Args:
+            handle_batch: Coroutine mapping a list of items to a list of results
+                (or exceptions) in the same order
+            window_ms: How long to wait for more items after the first one
+            max_batch_size: Flush immediately once this many items are queued
+        """
+        self.handle_batch = handle_batch
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif len(self._pending) == 1:
+            self._timer = loop.call_later(self.window, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        """Dispatch the queued items."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Handle a batch and resolve its waiters."""
+        try:
+            results = await self.handle_batch([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
 class LanguageAgent:
     """Agent for language generation and understanding."""
     
-    def __init__(self, openai_api_key: Optional[str] = None, model_name: str = "gpt-4"):
+    DEFAULT_SYSTEM_MESSAGE = "You are a helpful financial assistant providing accurate, concise information."
+    MARKET_BRIEF_SYSTEM_MESSAGE = "You are a financial analyst providing a concise market brief."
+    CONTEXT_SYSTEM_MESSAGE = "You are a financial expert providing accurate information based only on the given context."
+    
+    # Prompt templates, filled in with str.format_map
+    CONTEXT_TEMPLATE = """
+            Based on the following retrieved context, answer this question:
+            
+            Question: {query}
+            
+            {context_text}
+            
+            Use only the information in the provided context. If the context doesn't contain
+            enough information to answer the question fully, say so and explain what additional
+            information would be needed.
+            """
+    
+    MARKET_BRIEF_TEMPLATE = """
+        Generate a concise market brief for a portfolio manager focused on Asia tech stocks.
+        
+        Here's the key data:
+        
+        1. Asia Tech Allocation:
+        {asia_tech}
+        
+        2. Earnings Surprises:
+        {earnings}
+        
+        3. Market Sentiment:
+        {sentiment}
+        
+        4. Yield Environment:
+        {yields}
+        
+        Format the brief like this:
+        - Start with allocation changes (current vs previous)
+        - Mention key earnings surprises
+        - Describe regional sentiment
+        - End with any relevant yield information that impacts the outlook
+        
+        Keep the brief under 150 words, focused, and actionable.
+        """
+    
+    EARNINGS_SUMMARY_TEMPLATE = """
+            Generate a concise summary of the following earnings data:
+            
+            {earnings_data}
+            
+            Focus on:
+            1. Notable beats or misses
+            2. Patterns or trends
+            3. Implications for the market
+            
+            Keep the summary under 100 words.
+            """
+    
+    QUERY_TEMPLATE = """
+            Analyze the following financial query and extract key components:
+            
+            Query: "{query}"
+            
+            Determine:
+            1. What assets/tickers are being asked about
+            2. What type of information is being requested (e.g., price, performance, risk, earnings)
+            3. What time period is relevant
+            4. Any specific metrics or indicators mentioned
+            
+            Format the response as a JSON object with these keys:
+            - tickers: list of ticker symbols mentioned or implied
+            - information_type: what kind of information is being asked for
+            - time_period: relevant time period
+            - metrics: specific metrics or indicators mentioned
+            - sentiment_analysis: is the query asking about sentiment or opinions
+            """
+    
+    QUERY_BATCH_TEMPLATE = """
+            Analyze each of the following financial queries and extract key components:
+            
+            {queries}
+            
+            For each query, determine:
+            1. What assets/tickers are being asked about
+            2. What type of information is being requested (e.g., price, performance, risk, earnings)
+            3. What time period is relevant
+            4. Any specific metrics or indicators mentioned
+            
+            Format the response as a JSON object with a single key "results": an array of
+            {count} objects, one per query in the order given, each with these keys:
+            - tickers: list of ticker symbols mentioned or implied
+            - information_type: what kind of information is being asked for
+            - time_period: relevant time period
+            - metrics: specific metrics or indicators mentioned
+            - sentiment_analysis: is the query asking about sentiment or opinions
+            """
+    
+    def __init__(self, openai_api_key: Optional[str] = None, model_name: str = "gpt-4",
+                 classifier_model_name: str = "gpt-4o-mini",
+                 max_concurrency: int = 16,
+                 max_requests_per_minute: float = 500,
+                 max_tokens_per_minute: float = 30000,
+                 batch_db_path: str = "data/earnings_batches.db",
+                 http_client: Optional[httpx.AsyncClient] = None,
+                 query_batch_window_ms: float = 50):
         """
         Initialize the Language Agent.
         
         Args:
             openai_api_key: OpenAI API key
             model_name: Name of the LLM model to use
+            classifier_model_name: Smaller, faster model used for query understanding
+            max_concurrency: Maximum number of in-flight OpenAI requests
+            max_requests_per_minute: OpenAI request budget per minute
+            max_tokens_per_minute: OpenAI token budget per minute
+            batch_db_path: SQLite file recording submitted earnings summary batches
+            http_client: Shared HTTP client (and connection pool) for OpenAI requests
+            query_batch_window_ms: Window for coalescing concurrent understand_query
+                calls into one request; 0 disables batching
         """
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         if not self.openai_api_key:
             logger.warning("OpenAI API key not provided. Language agent will not function.")
         
         self.model_name = model_name
-        self.client = OpenAI(api_key=self.openai_api_key)
+        self.classifier_model_name = classifier_model_name
+        # Retries are handled by _create_chat_completion, so disable the client's own
+        self.client = AsyncOpenAI(api_key=self.openai_api_key, max_retries=0,
+                                  http_client=http_client)
+        
+        # Keep bursts within the account's rate limits instead of tripping 429s
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = RateLimiter(max_requests_per_minute, max_tokens_per_minute)
+        self.pending_count = 0
+        self._response_cache = OrderedDict()
+        
+        self.batch_db_path = batch_db_path
+        
+        # Bursts of query understanding calls share one request per batch
+        self.query_batch_window_ms = query_batch_window_ms
+        self._query_batcher = MicroBatcher(self._understand_queries, query_batch_window_ms, QUERY_BATCH_SIZE)
         
         # Initialize Agno toolset
         self.toolkit = agno.ToolKit()
@@ -37,12 +378,16 @@ class LanguageAgent:
         # Add Agno tools
         self.setup_agno_tools()
     
+    async def aclose(self) -> None:
+        """Close the OpenAI client and its connection pool."""
+        await self.client.close()
+    
     def setup_agno_tools(self):
         """Set up Agno tools for the language agent."""
         
         # Market brief generation tool
         @self.toolkit.add
-        def generate_market_brief(data: Dict[str, Any]) -> str:
+        async def generate_market_brief(data: Dict[str, Any]) -> str:
             """
             Generate a market brief from financial data.
             
@@ -60,10 +405,9 @@ class LanguageAgent:
             
             # Generate brief using OpenAI
             prompt = self._create_market_brief_prompt(asia_tech, earnings, sentiment, yields)
-            response = self.client.chat.completions.create(
-                model=self.model_name,
+            response = await self._chat(
                 messages=[
-                    {"role": "system", "content": "You are a financial analyst providing a concise market brief."},
+                    {"role": "system", "content": self.MARKET_BRIEF_SYSTEM_MESSAGE},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
@@ -74,7 +418,7 @@ class LanguageAgent:
         
         # Query understanding tool
         @self.toolkit.add
-        def understand_query(query: str) -> Dict[str, Any]:
+        async def understand_query(query: str) -> Dict[str, Any]:
             """
             Understand a financial query and extract key components.
             
@@ -84,33 +428,16 @@ class LanguageAgent:
             Returns:
                 Dictionary with extracted components
             """
-            prompt = f"""
-            Analyze the following financial query and extract key components:
-            
-            Query: "{query}"
+            prompt = self.QUERY_TEMPLATE.format_map({"query": query})
             
-            Determine:
-            1. What assets/tickers are being asked about
-            2. What type of information is being requested (e.g., price, performance, risk, earnings)
-            3. What time period is relevant
-            4. Any specific metrics or indicators mentioned
-            
-            Format the response as a JSON object with these keys:
-            - tickers: list of ticker symbols mentioned or implied
-            - information_type: what kind of information is being asked for
-            - time_period: relevant time period
-            - metrics: specific metrics or indicators mentioned
-            - sentiment_analysis: is the query asking about sentiment or opinions
-            """
-            
-            response = self.client.chat.completions.create(
-                model=self.model_name,
+            response = await self._chat(
+                model=self.classifier_model_name,
                 messages=[
                     {"role": "system", "content": "You are a financial query analyzer."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
-                max_tokens=500,
+                max_tokens=QUERY_MAX_TOKENS,
                 response_format={"type": "json_object"}
             )
             
@@ -119,7 +446,7 @@ class LanguageAgent:
         
         # Generate earnings summary
         @self.toolkit.add
-        def generate_earnings_summary(earnings_data: Dict[str, Any]) -> str:
+        async def generate_earnings_summary(earnings_data: Dict[str, Any]) -> str:
             """
             Generate a summary of earnings surprises.
             
@@ -129,30 +456,185 @@ class LanguageAgent:
             Returns:
                 Earnings summary text
             """
-            prompt = f"""
-            Generate a concise summary of the following earnings data:
+            response = await self._chat(cache_ttl=EARNINGS_SUMMARY_CACHE_TTL,
+                                        **self._create_earnings_summary_request(earnings_data))
             
-            {json.dumps(earnings_data, indent=2)}
+            return response.choices[0].message.content
+    
+    async def _chat(self, messages: List[Dict[str, str]],
+                    cache_ttl: float = RESPONSE_CACHE_TTL, **kwargs):
+        """
+        Create a chat completion, reusing recent responses to identical requests.
+        
+        Requests with a temperature above RESPONSE_CACHE_MAX_TEMPERATURE are
+        not cached, since their responses are meant to vary.
+        
+        Args:
+            messages: Chat messages
+            cache_ttl: Seconds a cached response stays fresh
+            **kwargs: Extra arguments for chat.completions.create
             
-            Focus on:
-            1. Notable beats or misses
-            2. Patterns or trends
-            3. Implications for the market
+        Returns:
+            The chat completion
+        """
+        kwargs.setdefault("model", self.model_name)
+        if kwargs.get("temperature", 1.0) > RESPONSE_CACHE_MAX_TEMPERATURE:
+            return await self._create_chat_completion(messages, **kwargs)
+        
+        key = hashlib.blake2b(
+            json.dumps([messages, kwargs], sort_keys=True).encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        
+        entry = self._response_cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._response_cache.move_to_end(key)
+            return entry[1]
+        
+        response = await self._create_chat_completion(messages, **kwargs)
+        
+        self._response_cache[key] = (time.monotonic() + cache_ttl, response)
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+        
+        return response
+    
+    @retry(wait=wait_random_exponential(min=1, max=60),
+           stop=stop_after_attempt(OPENAI_RETRY_ATTEMPTS),
+           retry=retry_if_exception_type(RETRYABLE_OPENAI_ERRORS),
+           before_sleep=_log_openai_retry,
+           reraise=True)
+    async def _create_chat_completion(self, messages: List[Dict[str, str]], **kwargs):
+        """
+        Create a chat completion within the concurrency and rate limits.
+        
+        Rate limit, connection and server errors are retried with backoff.
+        A streamed completion keeps its concurrency slot after returning;
+        the caller must release self._semaphore once the stream is consumed.
+        
+        Args:
+            messages: Chat messages
+            **kwargs: Extra arguments for chat.completions.create
             
-            Keep the summary under 100 words.
-            """
+        Returns:
+            The chat completion
+        """
+        model_name = kwargs.pop("model", self.model_name)
+        estimated_tokens = sum(count_tokens(message["content"], model_name) for message in messages)
+        estimated_tokens += kwargs.get("max_tokens", 0)
+        
+        # Count the request as pending until it has both a slot and budget
+        self.pending_count += 1
+        try:
+            await self._semaphore.acquire()
+            try:
+                await self.rate_limiter.acquire(estimated_tokens)
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.pending_count -= 1
+        
+        try:
+            response = await self.client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                **kwargs
+            )
+        except BaseException:
+            self._semaphore.release()
+            raise
+        
+        if not kwargs.get("stream"):
+            self._semaphore.release()
+        return response
+    
+    async def _stream_chat(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding text as it is generated.
+        
+        Args:
+            messages: Chat messages
+            **kwargs: Extra arguments for chat.completions.create
+            
+        Yields:
+            Pieces of the response text
+        """
+        stream = await self._create_chat_completion(messages, stream=True, **kwargs)
+        
+        # Hold the concurrency slot until the whole body has been read
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            self._semaphore.release()
+    
+    async def _understand_queries(self, queries: List[str]) -> List[Any]:
+        """
+        Understand several queries with a single OpenAI request.
+        
+        Falls back to one request per query if the batched response does not
+        contain exactly one result per query.
+        
+        Args:
+            queries: User query texts
             
-            response = self.client.chat.completions.create(
-                model=self.model_name,
+        Returns:
+            Understanding results (or exceptions) in query order
+        """
+        if len(queries) == 1:
+            return [await self.toolkit.tools.understand_query(queries[0])]
+        
+        prompt = self.QUERY_BATCH_TEMPLATE.format_map({
+            "queries": "\n            ".join(f"{i+1}. {json.dumps(query)}" for i, query in enumerate(queries)),
+            "count": len(queries)
+        })
+        
+        try:
+            response = await self._chat(
+                model=self.classifier_model_name,
                 messages=[
-                    {"role": "system", "content": "You are a financial analyst summarizing earnings data."},
+                    {"role": "system", "content": "You are a financial query analyzer."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.3,
-                max_tokens=200
+                temperature=0.1,
+                max_tokens=QUERY_MAX_TOKENS * len(queries),
+                response_format={"type": "json_object"}
             )
+            results = json.loads(response.choices[0].message.content).get("results")
+            if isinstance(results, list) and len(results) == len(queries):
+                return results
+            logger.warning("Batched query understanding returned a mismatched result; retrying individually")
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Could not parse batched query understanding: {e}")
+        
+        return await asyncio.gather(
+            *(self.toolkit.tools.understand_query(query) for query in queries),
+            return_exceptions=True
+        )
+    
+    def _create_earnings_summary_request(self, earnings_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create the chat completion arguments for an earnings summary.
+        
+        Args:
+            earnings_data: Earnings data
             
-            return response.choices[0].message.content
+        Returns:
+            Keyword arguments for a chat completion
+        """
+        prompt = self.EARNINGS_SUMMARY_TEMPLATE.format_map({"earnings_data": _dump_json(earnings_data)})
+        
+        return {
+            "messages": [
+                {"role": "system", "content": "You are a financial analyst summarizing earnings data."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 200
+        }
     
     def _create_market_brief_prompt(self, 
                                   asia_tech: Dict[str, Any], 
@@ -171,35 +653,31 @@ class LanguageAgent:
         Returns:
             Prompt text
         """
-        prompt = f"""
-        Generate a concise market brief for a portfolio manager focused on Asia tech stocks.
-        
-        Here's the key data:
-        
-        1. Asia Tech Allocation:
-        {json.dumps(asia_tech, indent=2)}
-        
-        2. Earnings Surprises:
-        {json.dumps(earnings, indent=2)}
-        
-        3. Market Sentiment:
-        {json.dumps(sentiment, indent=2)}
-        
-        4. Yield Environment:
-        {json.dumps(yields, indent=2)}
-        
-        Format the brief like this:
-        - Start with allocation changes (current vs previous)
-        - Mention key earnings surprises
-        - Describe regional sentiment
-        - End with any relevant yield information that impacts the outlook
+        return self.MARKET_BRIEF_TEMPLATE.format_map({
+            "asia_tech": _dump_json(asia_tech),
+            "earnings": _dump_json(earnings),
+            "sentiment": _dump_json(sentiment),
+            "yields": _dump_json(yields)
+        })
+    
+    def _create_context_prompt(self, query: str, context: List[Dict[str, Any]]) -> str:
+        """
+        Create a prompt for answering a query from retrieved context.
         
-        Keep the brief under 150 words, focused, and actionable.
+        Args:
+            query: User query
+            context: List of retrieved context chunks
+            
+        Returns:
+            Prompt text
         """
+        # Format context for the prompt, keeping it within the token budget
+        context_text = "".join(f"\nContext {i+1}:\n{ctx.get('text', '')}\n" for i, ctx in enumerate(context))
+        context_text = truncate_tokens(context_text, CONTEXT_TOKEN_BUDGET, self.model_name)
         
-        return prompt
+        return self.CONTEXT_TEMPLATE.format_map({"query": query, "context_text": context_text})
     
-    def generate_market_brief(self, 
+    async def generate_market_brief(self, 
                             asia_tech: Dict[str, Any], 
                             earnings: Dict[str, Any],
                             sentiment: Dict[str, Any],
@@ -226,7 +704,7 @@ class LanguageAgent:
             }
             
             # Call Agno tool
-            result = self.toolkit.tools.generate_market_brief(data)
+            result = await self.toolkit.tools.generate_market_brief(data)
             
             return {
                 "success": True,
@@ -237,7 +715,7 @@ class LanguageAgent:
             logger.error(f"Error generating market brief: {e}")
             return {"success": False, "error": str(e)}
     
-    def understand_query(self, query: str) -> Dict[str, Any]:
+    async def understand_query(self, query: str) -> Dict[str, Any]:
         """
         Understand a user query using Agno.
         
@@ -248,8 +726,11 @@ class LanguageAgent:
             Dictionary with query understanding results
         """
         try:
-            # Call Agno tool
-            result = self.toolkit.tools.understand_query(query)
+            if self.query_batch_window_ms > 0:
+                result = await self._query_batcher.submit(query)
+            else:
+                # Call Agno tool
+                result = await self.toolkit.tools.understand_query(query)
             
             return {
                 "success": True,
@@ -260,7 +741,7 @@ class LanguageAgent:
             logger.error(f"Error understanding query: {e}")
             return {"success": False, "error": str(e)}
     
-    def generate_earnings_summary(self, earnings_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def generate_earnings_summary(self, earnings_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate an earnings summary using Agno.
         
@@ -272,7 +753,7 @@ class LanguageAgent:
         """
         try:
             # Call Agno tool
-            result = self.toolkit.tools.generate_earnings_summary(earnings_data)
+            result = await self.toolkit.tools.generate_earnings_summary(earnings_data)
             
             return {
                 "success": True,
@@ -283,7 +764,178 @@ class LanguageAgent:
             logger.error(f"Error generating earnings summary: {e}")
             return {"success": False, "error": str(e)}
     
-    def generate_response(self, prompt: str, system_message: str = "") -> Dict[str, Any]:
+    def _record_batch(self, batch_id: str, tickers: List[str]) -> None:
+        """Record a submitted earnings summary batch."""
+        os.makedirs(os.path.dirname(self.batch_db_path) or ".", exist_ok=True)
+        with closing(sqlite3.connect(self.batch_db_path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS earnings_batches "
+                "(batch_id TEXT PRIMARY KEY, tickers TEXT NOT NULL, created_at TEXT NOT NULL)"
+            )
+            conn.execute(
+                "INSERT INTO earnings_batches VALUES (?, ?, ?)",
+                (batch_id, json.dumps(tickers), datetime.now().isoformat())
+            )
+    
+    def _lookup_batch(self, batch_id: str) -> Optional[List[str]]:
+        """Return the tickers recorded for a submitted batch, or None if it was not recorded."""
+        if not os.path.exists(self.batch_db_path):
+            return None
+        with closing(sqlite3.connect(self.batch_db_path)) as conn:
+            try:
+                row = conn.execute(
+                    "SELECT tickers FROM earnings_batches WHERE batch_id = ?", (batch_id,)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                return None
+        return json.loads(row[0]) if row else None
+    
+    async def submit_earnings_summary_batch(self, earnings_by_ticker: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Submit earnings summaries for many tickers as an OpenAI batch job.
+        
+        Batch jobs complete within 24 hours at half the cost of regular calls,
+        which suits non-interactive backfills such as summaries at market open.
+        
+        Args:
+            earnings_by_ticker: Earnings data keyed by ticker
+            
+        Returns:
+            Dictionary with the batch ID and status
+        """
+        try:
+            lines = []
+            for ticker, earnings_data in earnings_by_ticker.items():
+                body = self._create_earnings_summary_request(earnings_data)
+                body["model"] = self.model_name
+                lines.append(json.dumps({
+                    "custom_id": ticker,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": body
+                }))
+            
+            batch_file = await self.client.files.create(
+                file=("earnings_summaries.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error submitting earnings summary batch: {e}")
+            return {"success": False, "error": str(e)}
+        
+        # The batch exists upstream now, so a failed local record must not lose its ID
+        try:
+            await asyncio.to_thread(self._record_batch, batch.id, list(earnings_by_ticker))
+        except Exception as e:
+            logger.error(f"Error recording earnings summary batch {batch.id}: {e}")
+        
+        return {
+            "success": True,
+            "batch_id": batch.id,
+            "status": batch.status
+        }
+    
+    async def get_earnings_summary_batch(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Get the status of an earnings summary batch, with summaries once it has completed.
+        
+        Args:
+            batch_id: ID returned by submit_earnings_summary_batch
+            
+        Returns:
+            Dictionary with the batch status, the tickers it was submitted for
+            (None if it was not recorded locally), any summaries keyed by ticker
+            and the tickers still missing a result
+        """
+        try:
+            batch = await self.client.batches.retrieve(batch_id)
+            try:
+                tickers = await asyncio.to_thread(self._lookup_batch, batch_id)
+            except Exception as e:
+                logger.error(f"Error looking up earnings summary batch {batch_id}: {e}")
+                tickers = None
+            
+            result = {
+                "success": True,
+                "batch_id": batch.id,
+                "status": batch.status,
+                "tickers": tickers,
+                "summaries": {},
+                "errors": {},
+                "missing": list(tickers or [])
+            }
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                return result
+            
+            content = await self.client.files.content(batch.output_file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    result["summaries"][record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+                else:
+                    result["errors"][record["custom_id"]] = record.get("error") or response.get("body")
+            
+            if tickers is not None:
+                result["missing"] = [
+                    ticker for ticker in tickers
+                    if ticker not in result["summaries"] and ticker not in result["errors"]
+                ]
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error retrieving earnings summary batch: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def generate_full_brief(self, 
+                                asia_tech: Dict[str, Any], 
+                                earnings: Dict[str, Any],
+                                sentiment: Dict[str, Any],
+                                yields: Dict[str, Any],
+                                query: str) -> Dict[str, Any]:
+        """
+        Generate a market brief, query understanding and earnings summary concurrently.
+        
+        Args:
+            asia_tech: Asia tech exposure data
+            earnings: Earnings data
+            sentiment: Market sentiment data
+            yields: Yield data
+            query: User query text
+            
+        Returns:
+            Dictionary with the brief, understanding and summary
+        """
+        brief, understanding, summary = await asyncio.gather(
+            self.generate_market_brief(asia_tech, earnings, sentiment, yields),
+            self.understand_query(query),
+            self.generate_earnings_summary(earnings)
+        )
+        
+        results = [brief, understanding, summary]
+        errors = [result["error"] for result in results if not result["success"]]
+        if errors:
+            return {"success": False, "error": "; ".join(errors)}
+        
+        return {
+            "success": True,
+            "brief": brief["brief"],
+            "understanding": understanding["understanding"],
+            "summary": summary["summary"]
+        }
+    
+    async def generate_response(self, prompt: str, system_message: str = "") -> Dict[str, Any]:
         """
         Generate a response using the LLM.
         
@@ -297,11 +949,10 @@ class LanguageAgent:
         try:
             # Set default system message if not provided
             if not system_message:
-                system_message = "You are a helpful financial assistant providing accurate, concise information."
+                system_message = self.DEFAULT_SYSTEM_MESSAGE
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model_name,
+            response = await self._chat(
                 messages=[
                     {"role": "system", "content": system_message},
                     {"role": "user", "content": prompt}
@@ -319,7 +970,7 @@ class LanguageAgent:
             logger.error(f"Error generating response: {e}")
             return {"success": False, "error": str(e)}
     
-    def synthesize_from_retrieved_context(self, 
+    async def synthesize_from_retrieved_context(self, 
                                         query: str, 
                                         context: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -333,28 +984,75 @@ class LanguageAgent:
             Dictionary with synthesized response
         """
         try:
-            # Format context for the prompt
-            context_text = ""
-            for i, ctx in enumerate(context):
-                context_text += f"\nContext {i+1}:\n{ctx.get('text', '')}\n"
-            
-            # Create prompt
-            prompt = f"""
-            Based on the following retrieved context, answer this question:
-            
-            Question: {query}
-            
-            {context_text}
-            
-            Use only the information in the provided context. If the context doesn't contain
-            enough information to answer the question fully, say so and explain what additional
-            information would be needed.
-            """
-            
-            # Generate response
-            system_message = "You are a financial expert providing accurate information based only on the given context."
-            return self.generate_response(prompt, system_message)
+            prompt = self._create_context_prompt(query, context)
+            return await self.generate_response(prompt, self.CONTEXT_SYSTEM_MESSAGE)
             
         except Exception as e:
             logger.error(f"Error synthesizing from context: {e}")
             return {"success": False, "error": str(e)}
+    
+    async def stream_market_brief(self, 
+                                  asia_tech: Dict[str, Any], 
+                                  earnings: Dict[str, Any],
+                                  sentiment: Dict[str, Any],
+                                  yields: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream a market brief as it is generated.
+        
+        Args:
+            asia_tech: Asia tech exposure data
+            earnings: Earnings data
+            sentiment: Market sentiment data
+            yields: Yield data
+            
+        Yields:
+            Pieces of the market brief
+        """
+        prompt = self._create_market_brief_prompt(asia_tech, earnings, sentiment, yields)
+        async for text in self._stream_chat(
+            messages=[
+                {"role": "system", "content": self.MARKET_BRIEF_SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=500
+        ):
+            yield text
+    
+    async def stream_response(self, prompt: str, system_message: str = "") -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM as it is generated.
+        
+        Args:
+            prompt: User prompt
+            system_message: Optional system message
+            
+        Yields:
+            Pieces of the response
+        """
+        async for text in self._stream_chat(
+            messages=[
+                {"role": "system", "content": system_message or self.DEFAULT_SYSTEM_MESSAGE},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=1000
+        ):
+            yield text
+    
+    async def stream_from_retrieved_context(self, 
+                                            query: str, 
+                                            context: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """
+        Stream a response synthesized from retrieved context.
+        
+        Args:
+            query: User query
+            context: List of retrieved context chunks
+            
+        Yields:
+            Pieces of the synthesized response
+        """
+        prompt = self._create_context_prompt(query, context)
+        async for text in self.stream_response(prompt, self.CONTEXT_SYSTEM_MESSAGE):
+            yield text
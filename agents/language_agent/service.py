@@ -2,8 +2,13 @@
 FastAPI service for the Language Agent.
 """
 import os
-from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -12,15 +17,53 @@ from .agent import LanguageAgent
 # Load environment variables
 load_dotenv()
 
-# Initialize the Language Agent
-language_agent = LanguageAgent(
-    openai_api_key=os.getenv("OPENAI_API_KEY"),
-    model_name=os.getenv("MODEL_NAME", "gpt-4")
-)
+logger = logging.getLogger(__name__)
+
+# Connection pool shared by all OpenAI requests, so concurrent calls reuse
+# warm TCP/TLS connections instead of opening new ones
+OPENAI_MAX_CONNECTIONS = 100
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 50
+
+# Requests are rejected with 429 once this many OpenAI calls are already
+# waiting for a concurrency slot or rate limit budget
+MAX_PENDING_OPENAI_REQUESTS = int(os.getenv("MAX_PENDING_OPENAI_REQUESTS", "64"))
+RETRY_AFTER_SECONDS = 5
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the Language Agent on startup and close its connection pool on shutdown."""
+    app.state.language_agent = LanguageAgent(
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        model_name=os.getenv("MODEL_NAME", "gpt-4"),
+        classifier_model_name=os.getenv("CLASSIFIER_MODEL_NAME", "gpt-4o-mini"),
+        max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")),
+        max_requests_per_minute=float(os.getenv("OPENAI_MAX_REQUESTS_PER_MINUTE", "500")),
+        max_tokens_per_minute=float(os.getenv("OPENAI_MAX_TOKENS_PER_MINUTE", "30000")),
+        batch_db_path=os.getenv("EARNINGS_BATCH_DB", "data/earnings_batches.db"),
+        query_batch_window_ms=float(os.getenv("QUERY_BATCH_WINDOW_MS", "50")),
+        http_client=httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+        ))
+    )
+    yield
+    await app.state.language_agent.aclose()
+
+def get_language_agent(request: Request) -> LanguageAgent:
+    """Return the Language Agent created by the lifespan hook."""
+    return request.app.state.language_agent
+
+def _check_backpressure(language_agent: LanguageAgent) -> None:
+    """Shed load when the OpenAI request queue is saturated."""
+    if language_agent.pending_count >= MAX_PENDING_OPENAI_REQUESTS:
+        raise HTTPException(status_code=429,
+                            detail="Language agent is overloaded, retry later",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
 
 # Create FastAPI app
 app = FastAPI(title="Language Agent Service", 
-              description="Natural language generation and understanding agent")
+              description="Natural language generation and understanding agent",
+              lifespan=lifespan)
 
 # Define request and response models
 class MarketBriefRequest(BaseModel):
@@ -29,12 +72,18 @@ class MarketBriefRequest(BaseModel):
     sentiment: Dict[str, Any]
     yields: Dict[str, Any]
 
+class FullBriefRequest(MarketBriefRequest):
+    query: str
+
 class QueryRequest(BaseModel):
     query: str
 
 class EarningsSummaryRequest(BaseModel):
     earnings_data: Dict[str, Any]
 
+class EarningsSummaryBatchRequest(BaseModel):
+    earnings_by_ticker: Dict[str, Dict[str, Any]]
+
 class ResponseRequest(BaseModel):
     prompt: str
     system_message: str = ""
@@ -48,19 +97,70 @@ class ApiResponse(BaseModel):
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+def _event_stream(chunks: AsyncIterator[str]) -> StreamingResponse:
+    """
+    Send generated text as Server-Sent Events.
+    
+    Each piece of text is sent as a JSON-encoded data event, followed by a
+    final "done" event, or an "error" event if generation fails.
+    """
+    async def events():
+        try:
+            async for text in chunks:
+                yield f"data: {json.dumps({'text': text})}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
 @app.get("/")
 async def read_root():
     """Health check endpoint."""
     return {"status": "ok", "service": "language_agent"}
 
 @app.post("/market-brief", response_model=ApiResponse)
-async def generate_market_brief(request: MarketBriefRequest):
+async def generate_market_brief(request: MarketBriefRequest,
+                                language_agent: LanguageAgent = Depends(get_language_agent)):
     """Generate a market brief."""
-    result = language_agent.generate_market_brief(
+    _check_backpressure(language_agent)
+    result = await language_agent.generate_market_brief(
+        request.asia_tech,
+        request.earnings,
+        request.sentiment,
+        request.yields
+    )
+    if result["success"]:
+        return {"success": True, "data": result}
+    else:
+        return {"success": False, "error": result.get("error", "Unknown error")}
+
+@app.post("/market-brief/stream")
+async def stream_market_brief(request: MarketBriefRequest,
+                              language_agent: LanguageAgent = Depends(get_language_agent)):
+    """Stream a market brief as Server-Sent Events."""
+    _check_backpressure(language_agent)
+    return _event_stream(language_agent.stream_market_brief(
         request.asia_tech,
         request.earnings,
         request.sentiment,
         request.yields
+    ))
+
+@app.post("/full-brief", response_model=ApiResponse)
+async def generate_full_brief(request: FullBriefRequest,
+                              language_agent: LanguageAgent = Depends(get_language_agent)):
+    """Generate a market brief, query understanding and earnings summary in one call."""
+    _check_backpressure(language_agent)
+    result = await language_agent.generate_full_brief(
+        request.asia_tech,
+        request.earnings,
+        request.sentiment,
+        request.yields,
+        request.query
     )
     if result["success"]:
         return {"success": True, "data": result}
@@ -68,37 +168,80 @@ async def generate_market_brief(request: MarketBriefRequest):
         return {"success": False, "error": result.get("error", "Unknown error")}
 
 @app.post("/understand-query", response_model=ApiResponse)
-async def understand_query(request: QueryRequest):
+async def understand_query(request: QueryRequest,
+                           language_agent: LanguageAgent = Depends(get_language_agent)):
     """Understand a user query."""
-    result = language_agent.understand_query(request.query)
+    _check_backpressure(language_agent)
+    result = await language_agent.understand_query(request.query)
     if result["success"]:
         return {"success": True, "data": result}
     else:
         return {"success": False, "error": result.get("error", "Unknown error")}
 
 @app.post("/earnings-summary", response_model=ApiResponse)
-async def generate_earnings_summary(request: EarningsSummaryRequest):
+async def generate_earnings_summary(request: EarningsSummaryRequest,
+                                    language_agent: LanguageAgent = Depends(get_language_agent)):
     """Generate an earnings summary."""
-    result = language_agent.generate_earnings_summary(request.earnings_data)
+    _check_backpressure(language_agent)
+    result = await language_agent.generate_earnings_summary(request.earnings_data)
+    if result["success"]:
+        return {"success": True, "data": result}
+    else:
+        return {"success": False, "error": result.get("error", "Unknown error")}
+
+@app.post("/earnings-summary-batch", response_model=ApiResponse)
+async def submit_earnings_summary_batch(request: EarningsSummaryBatchRequest,
+                                        language_agent: LanguageAgent = Depends(get_language_agent)):
+    """Submit earnings summaries for many tickers as a batch job."""
+    _check_backpressure(language_agent)
+    result = await language_agent.submit_earnings_summary_batch(request.earnings_by_ticker)
+    if result["success"]:
+        return {"success": True, "data": result}
+    else:
+        return {"success": False, "error": result.get("error", "Unknown error")}
+
+@app.get("/earnings-summary-batch/{batch_id}", response_model=ApiResponse)
+async def get_earnings_summary_batch(batch_id: str,
+                                     language_agent: LanguageAgent = Depends(get_language_agent)):
+    """Get the status and results of an earnings summary batch job."""
+    result = await language_agent.get_earnings_summary_batch(batch_id)
     if result["success"]:
         return {"success": True, "data": result}
     else:
         return {"success": False, "error": result.get("error", "Unknown error")}
 
 @app.post("/generate-response", response_model=ApiResponse)
-async def generate_response(request: ResponseRequest):
+async def generate_response(request: ResponseRequest,
+                            language_agent: LanguageAgent = Depends(get_language_agent)):
     """Generate a response using the LLM."""
-    result = language_agent.generate_response(request.prompt, request.system_message)
+    _check_backpressure(language_agent)
+    result = await language_agent.generate_response(request.prompt, request.system_message)
     if result["success"]:
         return {"success": True, "data": result}
     else:
         return {"success": False, "error": result.get("error", "Unknown error")}
 
+@app.post("/generate-response/stream")
+async def stream_response(request: ResponseRequest,
+                          language_agent: LanguageAgent = Depends(get_language_agent)):
+    """Stream a response from the LLM as Server-Sent Events."""
+    _check_backpressure(language_agent)
+    return _event_stream(language_agent.stream_response(request.prompt, request.system_message))
+
 @app.post("/synthesize-context", response_model=ApiResponse)
-async def synthesize_from_context(request: ContextRequest):
+async def synthesize_from_context(request: ContextRequest,
+                                  language_agent: LanguageAgent = Depends(get_language_agent)):
     """Synthesize a response from retrieved context."""
-    result = language_agent.synthesize_from_retrieved_context(request.query, request.context)
+    _check_backpressure(language_agent)
+    result = await language_agent.synthesize_from_retrieved_context(request.query, request.context)
     if result["success"]:
         return {"success": True, "data": result}
     else:
         return {"success": False, "error": result.get("error", "Unknown error")}
+
+@app.post("/synthesize-context/stream")
+async def stream_from_context(request: ContextRequest,
+                              language_agent: LanguageAgent = Depends(get_language_agent)):
+    """Stream a response synthesized from retrieved context as Server-Sent Events."""
+    _check_backpressure(language_agent)
+    return _event_stream(language_agent.stream_from_retrieved_context(request.query, request.context))
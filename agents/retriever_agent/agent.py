@@ -2,6 +2,10 @@ documents[doc_idx]
                 chunk = doc["chunks"][doc_chunk_idx]
                 metadata = doc["chunk_metadatas"][doc_chunk_idx]
                 
+                # Skip documents that already have a result before checking filters
+                if doc_idx in seen_docs:
+                    continue
+                
                 # Apply filters if specified
                 if filters:
                     skip = False
@@ -12,9 +16,6 @@ documents[doc_idx]
                     if skip:
                         continue
                 
-                # Check if we already have a result from this document
-                if doc_idx in seen_docs:
-                    continue
                 seen_docs.add(doc_idx)
                 
                 # Add to results
@@ -144,6 +145,33 @@ documents[doc_idx]
             logger.error(f"Error searching for company {ticker}: {e}")
             return {"success": False, "error": str(e)}
     
+    def _flatten_financial_data(self, data: Any, prefix: str = "") -> List[str]:
+        """
+        Flatten nested financial data into "key: value" lines.
+        
+        Nested keys are joined with dots and list items are keyed by position,
+        e.g. "history.0.close: 182.5". This embeds more densely than indented
+        JSON, which spends tokens on whitespace and punctuation.
+        
+        Args:
+            data: Financial data (dict, list or scalar)
+            prefix: Key path of data within the top-level dictionary
+            
+        Returns:
+            List of "key: value" lines
+        """
+        if isinstance(data, dict):
+            items = data.items()
+        elif isinstance(data, list):
+            items = enumerate(data)
+        else:
+            return [f"{prefix}: {data}"]
+        
+        lines = []
+        for key, value in items:
+            lines.extend(self._flatten_financial_data(value, f"{prefix}.{key}" if prefix else str(key)))
+        return lines
+    
     def add_financial_data(self, 
                           data: Dict[str, Any], 
                           source: str) -> Dict[str, Any]:
@@ -158,8 +186,8 @@ documents[doc_idx]
             Dictionary with indexing results
         """
         try:
-            # Convert data to text format for indexing
-            text = json.dumps(data, indent=2)
+            # Convert data to compact "key: value" lines for indexing
+            text = "\n".join(self._flatten_financial_data(data))
             
             # Create metadata
             metadata = {
@@ -264,19 +292,30 @@ documents[doc_idx]
         try:
             results = []
             
-            # If tickers are specified, search for each one
-            if tickers:
-                for ticker in tickers:
-                    ticker_results = self.search_by_company(ticker, query, k=2)
-                    if ticker_results["success"] and ticker_results["results"]:
-                        results.extend(ticker_results["results"])
-            
-            # Add general search results
-            general_results = self.search(query, k=k)
-            if general_results["success"] and general_results["results"]:
-                for result in general_results["results"]:
+            # Run one wide search and split it by ticker, rather than one
+            # filtered search per ticker plus a general search
+            known_tickers = [ticker for ticker in dict.fromkeys(tickers or []) if ticker in self.company_data]
+            if known_tickers:
+                candidates = self.search(query, k=k * (len(known_tickers) + 1) * 4)
+            else:
+                candidates = self.search(query, k=k)
+            
+            if known_tickers and candidates["success"]:
+                ticker_counts = dict.fromkeys(known_tickers, 0)
+                for result in candidates["results"]:
+                    ticker = result["metadata"].get("ticker")
+                    if ticker in ticker_counts and ticker_counts[ticker] < 2:
+                        ticker_counts[ticker] += 1
+                        results.append(result)
+            
+            seen_ids = {r["document_id"] for r in results}
+            
+            # Add general search results, which are the top k of the same ranking
+            if candidates["success"] and candidates["results"]:
+                for result in candidates["results"][:k]:
                     # Avoid duplicates
-                    if not any(r["document_id"] == result["document_id"] for r in results):
+                    if result["document_id"] not in seen_ids:
+                        seen_ids.add(result["document_id"])
                         results.append(result)
             
             # Sort by confidence
@@ -2,8 +2,13 @@
 FastAPI service for the Retriever Agent.
 """
 import os
+import json
+import asyncio
+from contextlib import asynccontextmanager
 from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException
+import anyio
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -12,12 +17,115 @@ from .agent import RetrieverAgent
 # Load environment variables
 load_dotenv()
 
-# Initialize the Retriever Agent
-retriever_agent = RetrieverAgent()
+# Threads that run index and embedding work off the event loop. FAISS and the
+# embedding model use multithreaded BLAS themselves, so keep this small.
+RETRIEVER_THREADPOOL_SIZE = int(os.getenv("RETRIEVER_THREADPOOL_SIZE", str(min(8, os.cpu_count() or 1))))
+
+class IndexAccess:
+    """Let searches run concurrently while index updates run alone."""
+    
+    def __init__(self):
+        """Initialize the guard with no active readers."""
+        self._readers = 0
+        self._no_readers = asyncio.Event()
+        self._no_readers.set()
+        self._write_lock = asyncio.Lock()
+    
+    @asynccontextmanager
+    async def read(self):
+        """Hold shared access; waits for any queued update to finish first."""
+        async with self._write_lock:
+            self._readers += 1
+            self._no_readers.clear()
+        try:
+            yield
+        finally:
+            self._readers -= 1
+            if self._readers == 0:
+                self._no_readers.set()
+    
+    @asynccontextmanager
+    async def write(self):
+        """Hold exclusive access once in-flight searches have drained."""
+        async with self._write_lock:
+            await self._no_readers.wait()
+            yield
+
+index_access = IndexAccess()
+
+async def _read(method, *args) -> Dict[str, Any]:
+    """Run a read-only Retriever Agent method in the threadpool."""
+    async with index_access.read():
+        return await run_in_threadpool(method, *args)
+
+async def _write(method, *args) -> Dict[str, Any]:
+    """Run an index-modifying Retriever Agent method in the threadpool."""
+    async with index_access.write():
+        result = await run_in_threadpool(method, *args)
+        inflight_searches.clear()
+        return result
+
+class InflightSearches:
+    """Share one agent call among concurrent identical search requests."""
+    
+    def __init__(self):
+        """Initialize with no searches in flight."""
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+    
+    async def run(self, method, *args) -> Dict[str, Any]:
+        """
+        Run a read-only agent method, joining an identical call already in flight.
+        
+        Args:
+            method: Bound RetrieverAgent method
+            *args: Positional arguments, which together with the method name form
+                the coalescing key
+            
+        Returns:
+            The method's result
+        """
+        key = (method.__name__, json.dumps(args, sort_keys=True, default=str))
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(_read(method, *args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        
+        # Shield so one client disconnecting does not cancel the shared call
+        return await asyncio.shield(future)
+    
+    def _forget(self, key: tuple, future: asyncio.Future) -> None:
+        """Drop a finished call, unless it has already been replaced."""
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+    
+    def clear(self) -> None:
+        """Stop sharing calls that started before an index update."""
+        self._inflight.clear()
+
+inflight_searches = InflightSearches()
+
+def _to_api_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap an agent result in the ApiResponse envelope."""
+    if result["success"]:
+        return {"success": True, "data": result}
+    return {"success": False, "error": result.get("error", "Unknown error")}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the threadpool and load the Retriever Agent on startup."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = RETRIEVER_THREADPOOL_SIZE
+    app.state.retriever_agent = await run_in_threadpool(RetrieverAgent)
+    yield
+
+def get_retriever_agent(request: Request) -> RetrieverAgent:
+    """Return the Retriever Agent created by the lifespan hook."""
+    return request.app.state.retriever_agent
 
 # Create FastAPI app
 app = FastAPI(title="Retriever Agent Service", 
-              description="Financial data retrieval agent")
+              description="Financial data retrieval agent",
+              lifespan=lifespan)
 
 # Define request and response models
 class DocumentRequest(BaseModel):
@@ -63,93 +171,73 @@ async def read_root():
     return {"status": "ok", "service": "retriever_agent"}
 
 @app.post("/document", response_model=ApiResponse)
-async def add_document(request: DocumentRequest):
+async def add_document(request: DocumentRequest,
+                       retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Add a document to the index."""
-    result = retriever_agent.add_document(
+    result = await _write(
+        retriever_agent.add_document,
         request.text, request.metadata, request.chunk_size, request.chunk_overlap
     )
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    return _to_api_response(result)
 
 @app.post("/search", response_model=ApiResponse)
-async def search(request: SearchRequest):
+async def search(request: SearchRequest,
+                 retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Search for relevant documents."""
-    result = retriever_agent.search(request.query, request.k, request.filters)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await inflight_searches.run(retriever_agent.search, request.query, request.k, request.filters)
+    return _to_api_response(result)
 
 @app.get("/document/{document_id}", response_model=ApiResponse)
-async def get_document(document_id: int):
+async def get_document(document_id: int,
+                       retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Get a document by ID."""
-    result = retriever_agent.get_document(document_id)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await _read(retriever_agent.get_document, document_id)
+    return _to_api_response(result)
 
 @app.post("/clear", response_model=ApiResponse)
-async def clear_index():
+async def clear_index(retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Clear the index."""
-    result = retriever_agent.clear_index()
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await _write(retriever_agent.clear_index)
+    return _to_api_response(result)
 
 @app.get("/stats", response_model=ApiResponse)
-async def get_stats():
+async def get_stats(retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Get index statistics."""
-    result = retriever_agent.get_stats()
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await _read(retriever_agent.get_stats)
+    return _to_api_response(result)
 
 @app.post("/company/search", response_model=ApiResponse)
-async def search_by_company(request: CompanySearchRequest):
+async def search_by_company(request: CompanySearchRequest,
+                            retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Search for documents about a specific company."""
-    result = retriever_agent.search_by_company(request.ticker, request.query, request.k)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await _read(retriever_agent.search_by_company, request.ticker, request.query, request.k)
+    return _to_api_response(result)
 
 @app.post("/financial-data", response_model=ApiResponse)
-async def add_financial_data(request: FinancialDataRequest):
+async def add_financial_data(request: FinancialDataRequest,
+                             retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Add financial data to the index."""
-    result = retriever_agent.add_financial_data(request.data, request.source)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await _write(retriever_agent.add_financial_data, request.data, request.source)
+    return _to_api_response(result)
 
 @app.post("/filing", response_model=ApiResponse)
-async def add_filing(request: FilingRequest):
+async def add_filing(request: FilingRequest,
+                     retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Add an SEC filing to the index."""
-    result = retriever_agent.add_filing(request.filing_data, request.content)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await _write(retriever_agent.add_filing, request.filing_data, request.content)
+    return _to_api_response(result)
 
 @app.post("/news-article", response_model=ApiResponse)
-async def add_news_article(request: NewsArticleRequest):
+async def add_news_article(request: NewsArticleRequest,
+                           retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Add a news article to the index."""
-    result = retriever_agent.add_news_article(request.article)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await _write(retriever_agent.add_news_article, request.article)
+    return _to_api_response(result)
 
 @app.post("/financial-context", response_model=ApiResponse)
-async def query_financial_context(request: FinancialContextRequest):
+async def query_financial_context(request: FinancialContextRequest,
+                                  retriever_agent: RetrieverAgent = Depends(get_retriever_agent)):
     """Get financial context for a query."""
-    result = retriever_agent.query_financial_context(request.query, request.tickers, request.k)
-    if result["success"]:
-        return {"success": True, "data": result}
-    else:
-        return {"success": False, "error": result.get("error", "Unknown error")}
+    result = await inflight_searches.run(retriever_agent.query_financial_context,
+                                         request.query, request.tickers, request.k)
+    return _to_api_response(result)
@@ -3,28 +3,281 @@ Scraping Agent for crawling financial filings and news.
 """
 import os
 import re
+import gzip
+import time
+import hashlib
 import logging
-import json
+import asyncio
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
 from datetime import datetime, timedelta
+from itertools import islice
+from urllib.parse import urlparse
 from typing import Dict, List, Any, Optional, Union
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+import importlib.util
+import aiofiles
+import httpx
+import orjson
+from lxml import etree
+from selectolax.lexbor import LexborHTMLParser
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# SEC submissions indexes change at most a few times a day, so they are cached
+# in memory and on disk, keyed by padded CIK
+SEC_CACHE_DIR = os.getenv("SEC_CACHE_DIR", ".cache/sec")
+SEC_CACHE_TTL_SECONDS = float(os.getenv("SEC_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+
+# Filed documents never change, so scraped filing text is kept on disk for a
+# long time, gzipped because filing bodies are large
+FILING_CACHE_DIR = os.getenv("FILING_CACHE_DIR", ".cache/filings")
+FILING_CACHE_TTL_SECONDS = float(os.getenv("FILING_CACHE_TTL_SECONDS", str(30 * 24 * 60 * 60)))
+
+# Accession numbers appear without dashes in archive URLs
+ACCESSION_DASHES = str.maketrans('', '', '-')
+
+# EDGAR allows at most 10 requests per second per client
+SEC_MAX_CONCURRENCY = 8
+SEC_MAX_REQUESTS_PER_SECOND = 10
+
+# Common section titles in 10-K and 10-Q filings
+SECTION_PATTERNS = [
+    (r'Item\s+1A\.?\s+Risk\s+Factors', "Risk Factors"),
+    (r'Item\s+7\.?\s+Management\'s\s+Discussion\s+and\s+Analysis', "MD&A"),
+    (r'Item\s+3\.?\s+Quantitative\s+and\s+Qualitative\s+Disclosures\s+About\s+Market\s+Risk', "Market Risk"),
+    (r'Item\s+1\.?\s+Business', "Business"),
+    (r'Item\s+2\.?\s+Properties', "Properties"),
+    (r'Item\s+7A\.?\s+Quantitative\s+and\s+Qualitative\s+Disclosures\s+About\s+Market\s+Risk', "Market Risk"),
+    (r'Item\s+8\.?\s+Financial\s+Statements', "Financial Statements")
+]
+
+# All section headers fused into one pattern, so a single pass over the filing
+# finds every header; the matching group name maps back to the section name
+SECTION_HEADER_RX = re.compile(
+    '|'.join(f'(?P<s{i}>{pattern})' for i, (pattern, _) in enumerate(SECTION_PATTERNS)),
+    re.IGNORECASE
+)
+SECTION_NAMES = {f"s{i}": name for i, (_, name) in enumerate(SECTION_PATTERNS)}
+
+def _compile_section_database():
+    """Compile the section headers into a Hyperscan database, if available."""
+    if hyperscan is None:
+        return None
+    
+    try:
+        database = hyperscan.Database()
+        # UTF8 + UCP keeps \s matching Unicode whitespace (e.g. non-breaking
+        # spaces) like Python's re does; SOM_LEFTMOST reports start offsets
+        flags = (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST |
+                 hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP)
+        database.compile(
+            expressions=[pattern.encode() for pattern, _ in SECTION_PATTERNS],
+            ids=list(range(len(SECTION_PATTERNS))),
+            flags=[flags] * len(SECTION_PATTERNS)
+        )
+        return database
+    except Exception as e:
+        logger.warning(f"Could not compile Hyperscan section database, using re: {e}")
+        return None
+
+# Optional Hyperscan matcher for section headers (pip install hyperscan);
+# falls back to SECTION_HEADER_RX when the package is not installed
+SECTION_DATABASE = _compile_section_database()
+
+def _find_section_headers(content: str) -> List[tuple]:
+    """
+    Find every section header in a filing.
+    
+    Args:
+        content: The full text content of the filing
+        
+    Returns:
+        List of (start offset, section name) tuples in document order
+    """
+    if SECTION_DATABASE is None:
+        return [
+            (match.start(), SECTION_NAMES[match.lastgroup])
+            for match in SECTION_HEADER_RX.finditer(content)
+        ]
+    
+    data = content.encode("utf-8")
+    matches = set()
+    
+    def on_match(pattern_id, start, end, flags, context):
+        matches.add((start, pattern_id))
+    
+    SECTION_DATABASE.scan(data, match_event_handler=on_match)
+    matches = sorted(matches)
+    
+    # Hyperscan reports byte offsets; convert them to str offsets
+    if not content.isascii():
+        char_offsets = {}
+        byte_pos = char_pos = 0
+        for start, _ in matches:
+            if start not in char_offsets:
+                char_pos += len(data[byte_pos:start].decode("utf-8"))
+                byte_pos = start
+                char_offsets[start] = char_pos
+        matches = [(char_offsets[start], pattern_id) for start, pattern_id in matches]
+    
+    return [(start, SECTION_PATTERNS[pattern_id][1]) for start, pattern_id in matches]
+
+# Filing date and type patterns for the start of a filing. The type is matched
+# in a lookahead so it never consumes text a date match could start in.
+FILING_HEADER_RX = re.compile(
+    r'(?=(?P<type>\b(?:10-K|10-Q|8-K|20-F|6-K|13F)\b))'
+    r'|(?P<date>\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\w+ \d{1,2}, \d{4}\b)'
+)
+
+EVENT_RX = re.compile(r'Item\s+[0-9\.]+\s+(.*?)(?=Item\s+[0-9\.]+|$)')
+
+TITLE_PUNCTUATION_RX = re.compile(r'[^\w\s]')
+WHITESPACE_RX = re.compile(r'\s+')
+
+def normalize_title(title: str) -> str:
+    """Reduce a headline to lowercase words for duplicate detection."""
+    return WHITESPACE_RX.sub(' ', TITLE_PUNCTUATION_RX.sub('', title.lower())).strip()
+
+# Filings are downloaded in chunks of this many bytes
+FILING_CHUNK_SIZE = 64 * 1024
+
+# Worker processes that parse filings in parallel. Each uvicorn worker gets
+# its own pool, so the default splits the CPUs between them.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+FILING_PARSE_WORKERS = int(os.getenv("FILING_PARSE_WORKERS",
+                                     str(max(1, (os.cpu_count() or 1) // max(1, WEB_CONCURRENCY)))))
+
+class FilingTextCollector:
+    """
+    lxml parser target that collects a document's text nodes as it is parsed.
+    
+    Text inside script and style elements is dropped. Consecutive data
+    callbacks are merged, so each entry in chunks is one whole text node.
+    """
+    
+    SKIP_TAGS = {"script", "style"}
+    
+    def __init__(self):
+        """Initialize the collector."""
+        self.chunks = []
+        self._buffer = []
+        self._skip_depth = 0
+    
+    def _flush(self) -> None:
+        """End the current text node."""
+        if self._buffer:
+            if not self._skip_depth:
+                self.chunks.append("".join(self._buffer))
+            self._buffer = []
+    
+    def start(self, tag, attrib) -> None:
+        self._flush()
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+    
+    def end(self, tag) -> None:
+        self._flush()
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+    
+    def data(self, text: str) -> None:
+        self._buffer.append(text)
+    
+    def comment(self, text: str) -> None:
+        self._flush()
+    
+    def close(self) -> str:
+        """Return the collected text nodes joined by spaces."""
+        self._flush()
+        return ' '.join(self.chunks)
+
+def _parse_filing(raw: Union[bytes, bytearray], encoding: str) -> Dict[str, Any]:
+    """
+    Extract the text, date and type of a filing from its raw HTML.
+    
+    Args:
+        raw: The filing's HTML as downloaded
+        encoding: Character encoding of raw
+        
+    Returns:
+        Dictionary with the filing type, filing date and text content
+    """
+    # Extract text content, removing scripts and styles
+    parser = etree.HTMLParser(target=FilingTextCollector(), encoding=encoding)
+    parser.feed(bytes(raw))
+    text = parser.close()
+    
+    # Clean up the text, stripping each line once and dropping blank ones
+    content = '\n'.join(filter(None, map(str.strip, text.splitlines())))
+    
+    # Try to extract filing date and type
+    filing_date = None
+    filing_type = None
+    
+    # Look for the first date and filing type (10-K, 10-Q, 8-K, etc.)
+    # in a single pass over the start of the content
+    for match in FILING_HEADER_RX.finditer(content[:1000]):
+        if match.lastgroup == "type":
+            filing_type = filing_type or match.group("type")
+        else:
+            filing_date = filing_date or match.group("date")
+        if filing_date and filing_type:
+            break
+    
+    return {
+        "filing_type": filing_type,
+        "filing_date": filing_date,
+        "content": content
+    }
+
+def _encode_filing_cache(entry: Dict[str, Any]) -> bytes:
+    """Serialize and gzip a filing cache entry."""
+    return gzip.compress(orjson.dumps(entry))
+
+def _decode_filing_cache(compressed: bytes) -> Dict[str, Any]:
+    """Decompress and parse a filing cache entry."""
+    return orjson.loads(gzip.decompress(compressed))
+
+_parse_pool = None
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    """Return the process pool used for filing parsing, creating it on first use."""
+    global _parse_pool
+    if _parse_pool is None:
+        # Forking a process that already runs the event loop and worker threads
+        # can deadlock, so workers are started from a clean forkserver instead
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("forkserver")
+        else:
+            mp_context = multiprocessing.get_context("spawn")
+        _parse_pool = ProcessPoolExecutor(max_workers=FILING_PARSE_WORKERS, mp_context=mp_context)
+    return _parse_pool
+
 class ScrapingAgent:
-    """Agent for scraping financial filings and news."""
+    """
+    Agent for scraping financial filings and news.
+    
+    Call startup() from inside the running event loop before scraping, and
+    aclose() when done.
+    """
     
     def __init__(self):
         """Initialize the Scraping Agent."""
-        self.session = requests.Session()
-        # Set user-agent to avoid being blocked
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        })
+        # Created by startup(), so no connection pool exists before the worker
+        # process and its event loop do
+        self.client: Optional[httpx.AsyncClient] = None
         
         # Base URLs for different sources
         self.sec_base_url = "https://www.sec.gov"
@@ -33,7 +286,162 @@ class ScrapingAgent:
         self.ft_url = "https://www.ft.com"
         self.reuters_url = "https://www.reuters.com"
         
-    def search_sec_filings(self, ticker: str, filing_type: str = "10-K,10-Q,8-K", 
+        # In-memory copy of the SEC submissions cache: cik -> (timestamp, payload)
+        self._sec_cache: Dict[str, tuple] = {}
+        
+        # Limits for requests to sec.gov hosts
+        self._sec_semaphore = asyncio.Semaphore(SEC_MAX_CONCURRENCY)
+        self._sec_request_times = deque(maxlen=SEC_MAX_REQUESTS_PER_SECOND)
+    
+    async def startup(self) -> None:
+        """Create the shared HTTP client."""
+        if self.client is not None:
+            return
+        
+        # Shared async client, so concurrent requests reuse pooled connections
+        self.client = httpx.AsyncClient(
+            # Set user-agent to avoid being blocked
+            headers={
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+            },
+            http2=HTTP2_AVAILABLE,
+            timeout=10,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    
+    async def aclose(self) -> None:
+        """Close the HTTP client and the filing parser processes."""
+        global _parse_pool
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+            _parse_pool = None
+    
+    @asynccontextmanager
+    async def _sec_throttle(self):
+        """
+        Hold a slot for one request to sec.gov.
+        
+        At most SEC_MAX_CONCURRENCY requests run at once, and each one waits
+        until it is at least a second after the request
+        SEC_MAX_REQUESTS_PER_SECOND places before it.
+        """
+        async with self._sec_semaphore:
+            now = time.monotonic()
+            start = now
+            if len(self._sec_request_times) == SEC_MAX_REQUESTS_PER_SECOND:
+                start = max(now, self._sec_request_times[0] + 1.0)
+            
+            # Reserve the slot before sleeping so concurrent callers queue behind it
+            self._sec_request_times.append(start)
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+    
+    async def _sec_get(self, url: str) -> httpx.Response:
+        """GET a sec.gov URL within the EDGAR rate limits."""
+        async with self._sec_throttle():
+            return await self.client.get(url)
+    
+    def _read_sec_cache(self, cik: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached submissions payload for cik, or None."""
+        entry = self._sec_cache.get(cik)
+        if entry is None:
+            path = os.path.join(SEC_CACHE_DIR, f"{cik}.json")
+            try:
+                with open(path, "rb") as f:
+                    cached = orjson.loads(f.read())
+                entry = (cached["timestamp"], cached["payload"])
+            except (OSError, ValueError, KeyError):
+                return None
+            self._sec_cache[cik] = entry
+        
+        timestamp, payload = entry
+        if time.time() - timestamp >= SEC_CACHE_TTL_SECONDS:
+            self._sec_cache.pop(cik, None)
+            return None
+        return payload
+    
+    def _write_sec_cache(self, cik: str, payload: Dict[str, Any]) -> None:
+        """Store a submissions payload in memory and on disk."""
+        timestamp = time.time()
+        self._sec_cache[cik] = (timestamp, payload)
+        
+        try:
+            os.makedirs(SEC_CACHE_DIR, exist_ok=True)
+            path = os.path.join(SEC_CACHE_DIR, f"{cik}.json")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps({"timestamp": timestamp, "payload": payload}))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write SEC cache for CIK {cik}: {e}")
+    
+    @staticmethod
+    def _filing_cache_path(url: str) -> str:
+        """Return the cache file path for a filing URL."""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(FILING_CACHE_DIR, f"{key}.json.gz")
+    
+    async def _read_filing_cache(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached scrape result for url, or None."""
+        try:
+            async with aiofiles.open(self._filing_cache_path(url), "rb") as f:
+                compressed = await f.read()
+            cached = await asyncio.to_thread(_decode_filing_cache, compressed)
+            if time.time() - cached["timestamp"] >= FILING_CACHE_TTL_SECONDS:
+                return None
+            return cached["payload"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable filing cache entry for {url}: {e}")
+            return None
+    
+    async def _write_filing_cache(self, url: str, result: Dict[str, Any]) -> None:
+        """Store a scrape result on disk."""
+        try:
+            compressed = await asyncio.to_thread(_encode_filing_cache,
+                                                 {"timestamp": time.time(), "payload": result})
+            
+            os.makedirs(FILING_CACHE_DIR, exist_ok=True)
+            path = self._filing_cache_path(url)
+            tmp_path = f"{path}.{os.getpid()}.{id(result)}.tmp"
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(compressed)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write filing cache for {url}: {e}")
+    
+    async def _get_sec_submissions(self, cik: str) -> Dict[str, Any]:
+        """
+        Get the EDGAR submissions index for a CIK, using the cache when fresh.
+        
+        Args:
+            cik: Zero-padded 10 digit CIK
+            
+        Returns:
+            Dictionary with the submissions payload, or an error
+        """
+        payload = await asyncio.to_thread(self._read_sec_cache, cik)
+        if payload is not None:
+            return {"data": payload, "success": True}
+        
+        url = f"https://data.sec.gov/submissions/CIK{cik}.json"
+        response = await self._sec_get(url)
+        if response.status_code != 200:
+            logger.error(f"Error fetching SEC data: {response.status_code}")
+            return {"success": False, "error": f"HTTP Error: {response.status_code}"}
+        
+        payload = orjson.loads(response.content)
+        await asyncio.to_thread(self._write_sec_cache, cik, payload)
+        return {"data": payload, "success": True}
+        
+    async def search_sec_filings(self, ticker: str, filing_type: str = "10-K,10-Q,8-K", 
                            limit: int = 5) -> Dict[str, Any]:
         """
         Search SEC EDGAR database for company filings.
@@ -48,17 +456,14 @@ class ScrapingAgent:
         """
         try:
             # SEC filings can be accessed via the EDGAR API
-            url = f"https://data.sec.gov/submissions/CIK{ticker.upper().zfill(10)}.json"
-            
-            response = self.session.get(url)
-            if response.status_code != 200:
-                logger.error(f"Error fetching SEC data: {response.status_code}")
-                return {"success": False, "error": f"HTTP Error: {response.status_code}"}
+            submissions = await self._get_sec_submissions(ticker.upper().zfill(10))
+            if not submissions["success"]:
+                return submissions
             
-            data = response.json()
+            data = submissions["data"]
             
             # Filter filings by type
-            filing_types = filing_type.split(",")
+            filing_types = frozenset(filing_type.split(","))
             recent_filings = []
             
             if "filings" in data and "recent" in data["filings"]:
@@ -70,24 +475,25 @@ class ScrapingAgent:
                     accession_numbers = filings_data.get("accessionNumber", [])
                     primary_docs = filings_data.get("primaryDocument", [])
                     
-                    for i in range(min(len(forms), len(dates))):
-                        if forms[i] in filing_types:
-                            filing_info = {
-                                "form": forms[i],
-                                "filing_date": dates[i],
-                                "url": None
-                            }
-                            
-                            # Construct URL if we have accession number and primary doc
-                            if i < len(accession_numbers) and i < len(primary_docs):
-                                accession = accession_numbers[i].replace("-", "")
-                                doc = primary_docs[i]
-                                filing_info["url"] = f"{self.sec_base_url}/Archives/edgar/data/{data['cik']}/{accession}/{doc}"
-                            
-                            recent_filings.append(filing_info)
-                            
-                            if len(recent_filings) >= limit:
-                                break
+                    # The recent filings are parallel columns, so select the
+                    # matching rows by index before building any dicts
+                    matching = (i for i in range(min(len(forms), len(dates)))
+                                if forms[i] in filing_types)
+                    keep = list(islice(matching, max(limit, 1)))
+                    
+                    # Construct URL if we have accession number and primary doc
+                    url_rows = min(len(accession_numbers), len(primary_docs))
+                    archive_url = (f"{self.sec_base_url}/Archives/edgar/data/{data['cik']}"
+                                   if keep and keep[0] < url_rows else "")
+                    recent_filings = [
+                        {
+                            "form": forms[i],
+                            "filing_date": dates[i],
+                            "url": (f"{archive_url}/{accession_numbers[i].translate(ACCESSION_DASHES)}/{primary_docs[i]}"
+                                    if i < url_rows else None)
+                        }
+                        for i in keep
+                    ]
             
             return {
                 "ticker": ticker,
@@ -101,7 +507,7 @@ class ScrapingAgent:
             logger.error(f"Error searching SEC filings for {ticker}: {e}")
             return {"ticker": ticker, "success": False, "error": str(e)}
     
-    def scrape_filing_content(self, url: str) -> Dict[str, Any]:
+    async def scrape_filing_content(self, url: str) -> Dict[str, Any]:
         """
         Scrape content from an SEC filing URL.
         
@@ -112,45 +518,30 @@ class ScrapingAgent:
             Dictionary with filing content
         """
         try:
-            response = self.session.get(url)
-            if response.status_code != 200:
-                logger.error(f"Error fetching filing: {response.status_code}")
-                return {"success": False, "error": f"HTTP Error: {response.status_code}"}
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract text content, removing scripts and styles
-            for script in soup(["script", "style"]):
-                script.extract()
-            
-            # Get text and clean it up
-            text = soup.get_text(separator=' ')
-            lines = [line.strip() for line in text.splitlines() if line.strip()]
-            content = '\n'.join(lines)
-            
-            # Try to extract filing date and type
-            filing_date = None
-            filing_type = None
-            
-            # Look for common date patterns in the content
-            date_pattern = r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b|\b\w+ \d{1,2}, \d{4}\b'
-            date_matches = re.findall(date_pattern, content[:1000])
-            if date_matches:
-                filing_date = date_matches[0]
+            cached = await self._read_filing_cache(url)
+            if cached is not None:
+                return cached
+            
+            is_sec_url = (urlparse(url).hostname or "").endswith("sec.gov")
+            throttle = self._sec_throttle() if is_sec_url else nullcontext()
+            async with throttle, self.client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    logger.error(f"Error fetching filing: {response.status_code}")
+                    return {"success": False, "error": f"HTTP Error: {response.status_code}"}
+                
+                raw = bytearray()
+                async for chunk in response.aiter_bytes(FILING_CHUNK_SIZE):
+                    raw += chunk
+                encoding = response.encoding or "utf-8"
             
-            # Try to find filing type (10-K, 10-Q, 8-K, etc.)
-            type_pattern = r'\b(10-K|10-Q|8-K|20-F|6-K|13F)\b'
-            type_matches = re.findall(type_pattern, content[:1000])
-            if type_matches:
-                filing_type = type_matches[0]
+            # Parsing is CPU bound, so it runs in a worker process to keep the
+            # event loop free and let several filings parse in parallel
+            loop = asyncio.get_running_loop()
+            parsed = await loop.run_in_executor(_get_parse_pool(), _parse_filing, raw, encoding)
             
-            return {
-                "url": url,
-                "filing_type": filing_type,
-                "filing_date": filing_date,
-                "content": content,
-                "success": True
-            }
+            result = {"url": url, **parsed, "success": True}
+            await self._write_filing_cache(url, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error scraping filing from {url}: {e}")
@@ -170,26 +561,8 @@ class ScrapingAgent:
         sections = {}
         
         if filing_type in ["10-K", "10-Q"]:
-            # Common section titles in 10-K and 10-Q filings
-            section_patterns = [
-                (r'Item\s+1A\.?\s+Risk\s+Factors', "Risk Factors"),
-                (r'Item\s+7\.?\s+Management\'s\s+Discussion\s+and\s+Analysis', "MD&A"),
-                (r'Item\s+3\.?\s+Quantitative\s+and\s+Qualitative\s+Disclosures\s+About\s+Market\s+Risk', "Market Risk"),
-                (r'Item\s+1\.?\s+Business', "Business"),
-                (r'Item\s+2\.?\s+Properties', "Properties"),
-                (r'Item\s+7A\.?\s+Quantitative\s+and\s+Qualitative\s+Disclosures\s+About\s+Market\s+Risk', "Market Risk"),
-                (r'Item\s+8\.?\s+Financial\s+Statements', "Financial Statements")
-            ]
-            
-            # Find the starting positions of each section
-            section_positions = []
-            for pattern, name in section_patterns:
-                matches = re.finditer(pattern, content, re.IGNORECASE)
-                for match in matches:
-                    section_positions.append((match.start(), name))
-            
-            # Sort by position
-            section_positions.sort()
+            # Find the starting positions of each section, in document order
+            section_positions = _find_section_headers(content)
             
             # Extract each section's content
             for i in range(len(section_positions)):
@@ -197,24 +570,21 @@ class ScrapingAgent:
                 section_name = section_positions[i][1]
                 
                 # End position is either the start of next section or end of content
-                end_pos = content.find("Item", start_pos + 100) if i < len(section_positions) - 1 else None
-                if end_pos == -1:
-                    end_pos = None
+                end_pos = section_positions[i + 1][0] if i + 1 < len(section_positions) else None
                 
                 section_content = content[start_pos:end_pos]
                 sections[section_name] = section_content
         
         elif filing_type == "8-K":
             # For 8-K, try to extract the main event and details
-            event_pattern = r'Item\s+[0-9\.]+\s+(.*?)(?=Item\s+[0-9\.]+|$)'
-            events = re.findall(event_pattern, content)
+            events = EVENT_RX.findall(content)
             
             for i, event in enumerate(events):
                 sections[f"Event {i+1}"] = event.strip()
         
         return sections
     
-    def search_financial_news(self, query: str, limit: int = 5) -> Dict[str, Any]:
+    async def search_financial_news(self, query: str, limit: int = 5) -> Dict[str, Any]:
         """
         Search for financial news related to a query.
         
@@ -228,30 +598,30 @@ class ScrapingAgent:
         try:
             # Try Yahoo Finance news search
             url = f"{self.yahoo_finance_url}/quote/{query}/news"
-            response = self.session.get(url)
+            response = await self.client.get(url)
             
             if response.status_code != 200:
                 logger.error(f"Error fetching news: {response.status_code}")
                 return {"success": False, "error": f"HTTP Error: {response.status_code}"}
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            tree = LexborHTMLParser(response.text)
             news_items = []
             
             # Extract news items
-            articles = soup.select('li[class*="js-stream-content"]')
+            articles = tree.css('li[class*="js-stream-content"]')
             
             for article in articles[:limit]:
-                title_elem = article.select_one('h3, a[class*="headline"]')
-                link_elem = article.select_one('a[href^="https://"]')
-                time_elem = article.select_one('span[class*="timing"]')
-                source_elem = article.select_one('div[class*="source"]')
+                title_elem = article.css_first('h3, a[class*="headline"]')
+                link_elem = article.css_first('a[href^="https://"]')
+                time_elem = article.css_first('span[class*="timing"]')
+                source_elem = article.css_first('div[class*="source"]')
                 
                 if title_elem and link_elem:
                     news_item = {
-                        "title": title_elem.get_text().strip(),
-                        "url": link_elem['href'],
-                        "timestamp": time_elem.get_text().strip() if time_elem else None,
-                        "source": source_elem.get_text().strip() if source_elem else "Yahoo Finance"
+                        "title": title_elem.text().strip(),
+                        "url": link_elem.attributes['href'],
+                        "timestamp": time_elem.text().strip() if time_elem else None,
+                        "source": source_elem.text().strip() if source_elem else "Yahoo Finance"
                     }
                     news_items.append(news_item)
             
@@ -265,7 +635,7 @@ class ScrapingAgent:
             logger.error(f"Error searching news for {query}: {e}")
             return {"query": query, "success": False, "error": str(e)}
     
-    def scrape_earnings_calendar(self, days: int = 7) -> Dict[str, Any]:
+    async def scrape_earnings_calendar(self, days: int = 7) -> Dict[str, Any]:
         """
         Scrape upcoming earnings calendar.
         
@@ -287,33 +657,33 @@ class ScrapingAgent:
             # Yahoo Finance earnings calendar URL
             url = f"{self.yahoo_finance_url}/calendar/earnings?from={today_str}&to={end_str}&day=alldays"
             
-            response = self.session.get(url)
+            response = await self.client.get(url)
             if response.status_code != 200:
                 logger.error(f"Error fetching earnings calendar: {response.status_code}")
                 return {"success": False, "error": f"HTTP Error: {response.status_code}"}
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            tree = LexborHTMLParser(response.text)
             
             # Parse the earnings table
             earnings_data = []
-            tables = soup.select('table[class*="W(100%)"]')
+            tables = tree.css('table[class*="W(100%)"]')
             
             for table in tables:
-                rows = table.select('tbody tr')
+                rows = table.css('tbody tr')
                 
                 for row in rows:
-                    cells = row.select('td')
+                    cells = row.css('td')
                     if len(cells) >= 5:  # Make sure we have enough cells
                         try:
-                            symbol = cells[0].get_text().strip()
-                            company = cells[1].get_text().strip()
+                            symbol = cells[0].text().strip()
+                            company = cells[1].text().strip()
                             
                             # Extract date from the page or table header
-                            date_header = soup.select_one('h3[class*="Py(10px)"]')
-                            earnings_date = date_header.get_text().strip() if date_header else "Unknown Date"
+                            date_header = tree.css_first('h3[class*="Py(10px)"]')
+                            earnings_date = date_header.text().strip() if date_header else "Unknown Date"
                             
-                            call_time = cells[2].get_text().strip()
-                            eps_estimate = cells[3].get_text().strip()
+                            call_time = cells[2].text().strip()
+                            eps_estimate = cells[3].text().strip()
                             
                             earnings_data.append({
                                 "symbol": symbol,
@@ -337,7 +707,7 @@ class ScrapingAgent:
             logger.error(f"Error scraping earnings calendar: {e}")
             return {"success": False, "error": str(e)}
     
-    def get_asia_tech_news(self, limit: int = 10) -> Dict[str, Any]:
+    async def get_asia_tech_news(self, limit: int = 10) -> Dict[str, Any]:
         """
         Get news specifically focused on Asian tech companies.
         
@@ -361,18 +731,23 @@ class ScrapingAgent:
             
             all_news = []
             
-            for query in asia_tech_queries:
-                news_results = self.search_financial_news(query, limit=3)
+            # Query all sources concurrently, keeping results in query order
+            all_results = await asyncio.gather(
+                *(self.search_financial_news(query, limit=3) for query in asia_tech_queries)
+            )
+            for news_results in all_results:
                 if news_results["success"] and "news" in news_results:
                     all_news.extend(news_results["news"])
             
-            # Remove duplicates based on title
+            # Remove duplicates based on normalized title, so headlines that only
+            # differ in case, punctuation or spacing count as the same story
             unique_news = []
             seen_titles = set()
             
             for item in all_news:
-                if item["title"] not in seen_titles:
-                    seen_titles.add(item["title"])
+                title_key = normalize_title(item["title"])
+                if title_key not in seen_titles:
+                    seen_titles.add(title_key)
                     unique_news.append(item)
             
             # Sort by timestamp if available, otherwise keep original order
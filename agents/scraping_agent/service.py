@@ -2,9 +2,11 @@
 FastAPI service for the Scraping Agent.
 """
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, HTTPException, Request
+from pydantic import BaseModel, ValidationError
 from dotenv import load_dotenv
 
 from .agent import ScrapingAgent
@@ -12,12 +14,22 @@ from .agent import ScrapingAgent
 # Load environment variables
 load_dotenv()
 
-# Initialize the Scraping Agent
-scraping_agent = ScrapingAgent()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the Scraping Agent on startup and close it on shutdown."""
+    app.state.scraping_agent = ScrapingAgent()
+    await app.state.scraping_agent.startup()
+    yield
+    await app.state.scraping_agent.aclose()
+
+def get_scraping_agent(request: Request) -> ScrapingAgent:
+    """Return the Scraping Agent created by the lifespan hook."""
+    return request.app.state.scraping_agent
 
 # Create FastAPI app
 app = FastAPI(title="Scraping Agent Service", 
-              description="Financial filings and news scraping agent")
+              description="Financial filings and news scraping agent",
+              lifespan=lifespan)
 
 # Define request and response models
 class SecFilingsRequest(BaseModel):
@@ -40,15 +52,27 @@ class ApiResponse(BaseModel):
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+class BatchItem(BaseModel):
+    id: str
+    method: str = "POST"
+    url: str
+    body: Optional[Dict[str, Any]] = None
+
+class BatchItemResponse(BaseModel):
+    id: str
+    status: int
+    body: Dict[str, Any]
+
 @app.get("/")
 async def read_root():
     """Health check endpoint."""
     return {"status": "ok", "service": "scraping_agent"}
 
 @app.post("/sec-filings", response_model=ApiResponse)
-async def search_sec_filings(request: SecFilingsRequest):
+async def search_sec_filings(request: SecFilingsRequest,
+                             scraping_agent: ScrapingAgent = Depends(get_scraping_agent)):
     """Search SEC filings for a company."""
-    result = scraping_agent.search_sec_filings(
+    result = await scraping_agent.search_sec_filings(
         request.ticker, request.filing_type, request.limit
     )
     if result["success"]:
@@ -57,37 +81,80 @@ async def search_sec_filings(request: SecFilingsRequest):
         return {"success": False, "error": result.get("error", "Unknown error")}
 
 @app.post("/filing-content", response_model=ApiResponse)
-async def get_filing_content(request: FilingContentRequest):
+async def get_filing_content(request: FilingContentRequest,
+                             scraping_agent: ScrapingAgent = Depends(get_scraping_agent)):
     """Get content from an SEC filing URL."""
-    result = scraping_agent.scrape_filing_content(request.url)
+    result = await scraping_agent.scrape_filing_content(request.url)
     if result["success"]:
         return {"success": True, "data": result}
     else:
         return {"success": False, "error": result.get("error", "Unknown error")}
 
 @app.post("/news", response_model=ApiResponse)
-async def search_financial_news(request: NewsSearchRequest):
+async def search_financial_news(request: NewsSearchRequest,
+                                scraping_agent: ScrapingAgent = Depends(get_scraping_agent)):
     """Search for financial news."""
-    result = scraping_agent.search_financial_news(request.query, request.limit)
+    result = await scraping_agent.search_financial_news(request.query, request.limit)
     if result["success"]:
         return {"success": True, "data": result}
     else:
         return {"success": False, "error": result.get("error", "Unknown error")}
 
 @app.post("/earnings-calendar", response_model=ApiResponse)
-async def get_earnings_calendar(request: EarningsCalendarRequest):
+async def get_earnings_calendar(request: EarningsCalendarRequest,
+                                scraping_agent: ScrapingAgent = Depends(get_scraping_agent)):
     """Get upcoming earnings calendar."""
-    result = scraping_agent.scrape_earnings_calendar(request.days)
+    result = await scraping_agent.scrape_earnings_calendar(request.days)
     if result["success"]:
         return {"success": True, "data": result}
     else:
         return {"success": False, "error": result.get("error", "Unknown error")}
 
 @app.get("/asia-tech-news", response_model=ApiResponse)
-async def get_asia_tech_news():
+async def get_asia_tech_news(scraping_agent: ScrapingAgent = Depends(get_scraping_agent)):
     """Get news about Asian tech companies."""
-    result = scraping_agent.get_asia_tech_news()
+    result = await scraping_agent.get_asia_tech_news()
     if result["success"]:
         return {"success": True, "data": result}
     else:
         return {"success": False, "error": result.get("error", "Unknown error")}
+
+# Endpoints reachable through /batch: (method, path) -> (request model, handler)
+BATCH_ROUTES = {
+    ("POST", "/sec-filings"): (SecFilingsRequest, search_sec_filings),
+    ("POST", "/filing-content"): (FilingContentRequest, get_filing_content),
+    ("POST", "/news"): (NewsSearchRequest, search_financial_news),
+    ("POST", "/earnings-calendar"): (EarningsCalendarRequest, get_earnings_calendar),
+    ("GET", "/asia-tech-news"): (None, get_asia_tech_news),
+}
+
+async def _dispatch_batch_item(item: BatchItem, scraping_agent: ScrapingAgent) -> Dict[str, Any]:
+    """Run one sub-request of a batch by calling its endpoint handler directly."""
+    route = BATCH_ROUTES.get((item.method.upper(), item.url))
+    if route is None:
+        return {"id": item.id, "status": 404,
+                "body": {"success": False, "error": f"Unknown endpoint: {item.method} {item.url}"}}
+    
+    request_model, handler = route
+    try:
+        if request_model is None:
+            body = await handler(scraping_agent)
+        else:
+            body = await handler(request_model(**(item.body or {})), scraping_agent)
+    except ValidationError as e:
+        return {"id": item.id, "status": 422, "body": {"success": False, "error": str(e)}}
+    except Exception as e:
+        return {"id": item.id, "status": 500, "body": {"success": False, "error": str(e)}}
+    
+    return {"id": item.id, "status": 200, "body": body}
+
+@app.post("/batch", response_model=List[BatchItemResponse])
+async def batch(requests: List[BatchItem],
+                scraping_agent: ScrapingAgent = Depends(get_scraping_agent)):
+    """
+    Run several scraping requests in one round trip.
+    
+    Sub-requests are dispatched concurrently and answered in the order given,
+    each with the status and body its own endpoint would have returned.
+    """
+    return await asyncio.gather(*(_dispatch_batch_item(item, scraping_agent) for item in requests))
@@ -0,0 +1,72 @@
+"""
+Base64 and input helpers for audio payloads.
+
+Uses pybase64's SIMD codec when it is installed and falls back to the
+standard library otherwise.
+"""
+import base64
+from typing import Any, Optional, Union
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+def b64decode(data: Union[str, bytes]) -> bytes:
+    """
+    Decode base64 data, ignoring characters outside the base64 alphabet.
+    
+    Args:
+        data: Base64 encoded text
+    
+    Returns:
+        Decoded bytes
+    """
+    if pybase64 is not None:
+        return pybase64.b64decode(data, validate=False)
+    return base64.b64decode(data)
+
+def b64encode(data: bytes) -> str:
+    """
+    Encode bytes as a base64 string.
+    
+    Args:
+        data: Raw bytes
+    
+    Returns:
+        Base64 encoded text
+    """
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(data)
+    return base64.b64encode(data).decode("utf-8")
+
+def _decode_str(data: str) -> bytes:
+    """Decode a base64 data URI or bare base64 text."""
+    if data.startswith("data:audio"):
+        _, data = data.split(",", 1)
+    return b64decode(data)
+
+def _read_filelike(data: Any) -> Optional[bytes]:
+    """Read a file-like object, or return None for unsupported types."""
+    if hasattr(data, 'read'):
+        return data.read()
+    return None
+
+# Handlers for the exact input types; anything else is tried as a file
+_AUDIO_HANDLERS = {
+    bytes: lambda data: data,
+    str: _decode_str,
+}
+
+def audio_to_bytes(audio_data: Any) -> Optional[bytes]:
+    """
+    Convert audio input to raw bytes with a single type lookup.
+    
+    Args:
+        audio_data: Audio data in bytes, file-like object, base64 data URI
+            or base64 string
+    
+    Returns:
+        Raw audio bytes, or None if the format is not supported
+    """
+    return _AUDIO_HANDLERS.get(type(audio_data), _read_filelike)(audio_data)
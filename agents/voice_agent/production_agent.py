@@ -2,17 +2,51 @@
 Voice Agent implementation using OpenAI's Whisper and TTS APIs.
 """
 import os
+import hashlib
 import logging
-import tempfile
-import base64
-from typing import Dict, Any, Union, BinaryIO
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, Union, BinaryIO, AsyncIterator, Optional
 import openai
-from openai import OpenAI
+from openai import AsyncOpenAI
+
+from .codec import audio_to_bytes, b64encode
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=8)
+def get_openai_client(api_key: str) -> AsyncOpenAI:
+    """Return a shared OpenAI client per API key, reusing its connection pool."""
+    return AsyncOpenAI(api_key=api_key)
+
+# Recently synthesized MP3 audio, so repeated prompts skip the TTS round
+# trip. Entries are keyed on a digest of (text, voice) rather than the text.
+TTS_CACHE_SIZE = 256
+
+_tts_cache = OrderedDict()
+
+# Chunk size when streaming TTS audio to clients
+TTS_STREAM_CHUNK_SIZE = 64 * 1024
+
+def _tts_cache_key(text: str, voice: str) -> bytes:
+    """Return a fixed-size cache key for a (text, voice) pair."""
+    return hashlib.blake2b(f"{voice}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+def _tts_cache_get(key: bytes) -> Optional[bytes]:
+    """Return cached audio for key, or None."""
+    audio_data = _tts_cache.get(key)
+    if audio_data is not None:
+        _tts_cache.move_to_end(key)
+    return audio_data
+
+def _tts_cache_set(key: bytes, audio_data: bytes) -> None:
+    """Store audio, evicting the least recently used entries."""
+    _tts_cache[key] = audio_data
+    while len(_tts_cache) > TTS_CACHE_SIZE:
+        _tts_cache.popitem(last=False)
+
 class VoiceAgent:
     """
     Agent for speech-to-text and text-to-speech operations using OpenAI APIs.
@@ -29,11 +63,11 @@ class VoiceAgent:
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         
         # Initialize OpenAI client
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = get_openai_client(self.api_key)
         
         logger.info("Voice Agent initialized")
     
-    def speech_to_text(self, audio_data: Union[bytes, BinaryIO, str]) -> Dict[str, Any]:
+    async def speech_to_text(self, audio_data: Union[bytes, BinaryIO, str]) -> Dict[str, Any]:
         """
         Convert speech to text using OpenAI's Whisper API.
         
@@ -44,47 +78,31 @@ class VoiceAgent:
             Dictionary with transcription result
         """
         try:
-            # Handle different input types
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_file:
-                if isinstance(audio_data, bytes):
-                    temp_file.write(audio_data)
-                    temp_file.flush()
-                elif hasattr(audio_data, 'read'):
-                    # It's a file-like object
-                    temp_file.write(audio_data.read())
-                    temp_file.flush()
-                elif isinstance(audio_data, str) and audio_data.startswith("data:audio"):
-                    # It's a base64 data URI
-                    _, encoded = audio_data.split(",", 1)
-                    temp_file.write(base64.b64decode(encoded))
-                    temp_file.flush()
-                elif isinstance(audio_data, str):
-                    # Assume it's already base64 encoded
-                    temp_file.write(base64.b64decode(audio_data))
-                    temp_file.flush()
-                else:
-                    return {"success": False, "error": "Unsupported audio data format"}
-                
-                # Use OpenAI's Whisper API for transcription
-                with open(temp_file.name, "rb") as audio_file:
-                    transcript = self.client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file
-                    )
-                
-                logger.info(f"Transcription successful: {transcript.text}")
-                
-                return {
-                    "success": True,
-                    "text": transcript.text,
-                    "engine": "whisper"
-                }
+            # Read or decode the input according to its type
+            audio_content = audio_to_bytes(audio_data)
+            if audio_content is None:
+                return {"success": False, "error": "Unsupported audio data format"}
+            
+            # Use OpenAI's Whisper API for transcription, sending the audio
+            # straight from memory as a (filename, content, content type) tuple
+            transcript = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=("audio.wav", audio_content, "audio/wav")
+            )
+            
+            logger.info(f"Transcription successful: {transcript.text}")
+            
+            return {
+                "success": True,
+                "text": transcript.text,
+                "engine": "whisper"
+            }
         
         except Exception as e:
             logger.error(f"Error in speech to text conversion: {e}")
             return {"success": False, "error": f"Speech recognition failed: {str(e)}"}
     
-    def text_to_speech(self, text: str, voice: str = "alloy") -> Dict[str, Any]:
+    async def text_to_speech(self, text: str, voice: str = "alloy") -> Dict[str, Any]:
         """
         Convert text to speech using OpenAI's TTS API.
         
@@ -96,39 +114,89 @@ class VoiceAgent:
             Dictionary with audio data
         """
         try:
-            # Create a temporary file to store the audio
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=True) as temp_file:
-                # Use OpenAI's TTS API
-                response = self.client.audio.speech.create(
-                    model="gpt-4o-mini-tts",  # Using the latest model
-                    voice=voice,
-                    input=text
-                )
-                
-                # Save to temporary file
-                response.stream_to_file(temp_file.name)
-                
-                # Read the file back
-                with open(temp_file.name, "rb") as audio_file:
-                    audio_data = audio_file.read()
-                
-                # Convert to base64 for web playback
-                audio_base64 = base64.b64encode(audio_data).decode("utf-8")
-                
-                logger.info(f"Text-to-speech successful, generated {len(audio_data)} bytes")
-                
-                return {
-                    "success": True,
-                    "audio_data": audio_base64,
-                    "format": "mp3",
-                    "engine": "openai"
-                }
+            audio_data = await self._tts_fetch(text, voice)
+            
+            # Convert to base64 for web playback
+            audio_base64 = b64encode(audio_data)
+            
+            logger.info(f"Text-to-speech successful, generated {len(audio_data)} bytes")
+            
+            return {
+                "success": True,
+                "audio_data": audio_base64,
+                "format": "mp3",
+                "engine": "openai"
+            }
         
         except Exception as e:
             logger.error(f"Error in text to speech conversion: {e}")
             return {"success": False, "error": f"Text-to-speech failed: {str(e)}"}
     
-    def process_voice_query(self, audio_data: Union[bytes, BinaryIO, str]) -> Dict[str, Any]:
+    async def _tts_fetch(self, text: str, voice: str) -> bytes:
+        """
+        Get MP3 audio for text, reusing recently synthesized audio.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use
+            
+        Returns:
+            Raw MP3 bytes
+        """
+        key = _tts_cache_key(text, voice)
+        audio_data = _tts_cache_get(key)
+        if audio_data is not None:
+            return audio_data
+        
+        # Use OpenAI's TTS API
+        response = await self.client.audio.speech.create(
+            model="gpt-4o-mini-tts",  # Using the latest model
+            voice=voice,
+            input=text,
+            response_format="mp3"
+        )
+        
+        # The response body is already in memory, so no temp file is needed
+        audio_data = response.content
+        
+        _tts_cache_set(key, audio_data)
+        return audio_data
+    
+    async def text_to_speech_stream(self, text: str, voice: str = "alloy") -> AsyncIterator[bytes]:
+        """
+        Stream MP3 audio for text as OpenAI's TTS API produces it.
+        
+        Unlike text_to_speech, the audio is neither buffered nor base64
+        encoded, so clients can start playback before synthesis finishes.
+        
+        Args:
+            text: Text to convert to speech
+            voice: Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+            
+        Yields:
+            Chunks of MP3 bytes
+        """
+        key = _tts_cache_key(text, voice)
+        audio_data = _tts_cache_get(key)
+        if audio_data is not None:
+            yield audio_data
+            return
+        
+        chunks = []
+        async with self.client.audio.speech.with_streaming_response.create(
+            model="gpt-4o-mini-tts",
+            voice=voice,
+            input=text,
+            response_format="mp3"
+        ) as response:
+            async for chunk in response.iter_bytes(TTS_STREAM_CHUNK_SIZE):
+                chunks.append(chunk)
+                yield chunk
+        
+        # Cache the complete clip so later requests skip synthesis
+        _tts_cache_set(key, b"".join(chunks))
+    
+    async def process_voice_query(self, audio_data: Union[bytes, BinaryIO, str]) -> Dict[str, Any]:
         """
         Process a voice query by converting speech to text.
         
@@ -139,7 +207,7 @@ class VoiceAgent:
             Dictionary with query text
         """
         # Convert speech to text
-        stt_result = self.speech_to_text(audio_data)
+        stt_result = await self.speech_to_text(audio_data)
         
         if stt_result["success"]:
             return {
@@ -150,7 +218,7 @@ class VoiceAgent:
         else:
             return stt_result
     
-    def generate_voice_response(self, text: str, voice: str = "alloy") -> Dict[str, Any]:
+    async def generate_voice_response(self, text: str, voice: str = "alloy") -> Dict[str, Any]:
         """
         Generate a voice response from text.
         
@@ -162,7 +230,7 @@ class VoiceAgent:
             Dictionary with audio data
         """
         # Convert text to speech
-        tts_result = self.text_to_speech(text, voice)
+        tts_result = await self.text_to_speech(text, voice)
         
         if tts_result["success"]:
             return {
@@ -8,6 +8,8 @@ import base64
 from typing import Dict, Any
 from fastapi import FastAPI, HTTPException, Body, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -37,6 +39,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class SelectiveGZipMiddleware:
+    """GZipMiddleware that passes responses for the given paths through untouched."""
+    
+    def __init__(self, app, excluded_paths=(), **gzip_options):
+        self.app = app
+        self.gzip_app = GZipMiddleware(app, **gzip_options)
+        self.excluded_paths = frozenset(excluded_paths)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip_app(scope, receive, send)
+
+# Compress JSON responses, which carry base64 audio for text-to-speech, but
+# not the raw MP3 stream, which does not compress and must not be buffered
+app.add_middleware(SelectiveGZipMiddleware, excluded_paths={"/speak/stream"}, minimum_size=1024)
+
 class TextToSpeechRequest(BaseModel):
     text: str
     voice: str = "alloy"
@@ -64,7 +84,7 @@ async def transcribe_audio(audio_data: str = Body(...)):
     """
     try:
         # Process with the voice agent
-        result = voice_agent.speech_to_text(audio_data)
+        result = await voice_agent.speech_to_text(audio_data)
         
         if result["success"]:
             return {"success": True, "data": {"text": result["text"]}}
@@ -88,7 +108,7 @@ async def text_to_speech(request: TextToSpeechRequest):
     """
     try:
         # Process with the voice agent
-        result = voice_agent.text_to_speech(request.text, request.voice)
+        result = await voice_agent.text_to_speech(request.text, request.voice)
         
         if result["success"]:
             return {"success": True, "data": {
@@ -102,6 +122,36 @@ async def text_to_speech(request: TextToSpeechRequest):
         logger.error(f"Error converting text to speech: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/speak/stream")
+async def text_to_speech_stream(request: TextToSpeechRequest):
+    """
+    Convert text to speech, streaming raw MP3 audio.
+    
+    Args:
+        request: Request with text and voice
+        
+    Returns:
+        Streaming audio/mpeg response
+    """
+    stream = voice_agent.text_to_speech_stream(request.text, request.voice)
+    
+    # Start synthesis before sending headers so upstream failures still
+    # produce an error response
+    try:
+        first_chunk = await stream.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
+    except Exception as e:
+        logger.error(f"Error streaming text to speech: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def chunks():
+        yield first_chunk
+        async for chunk in stream:
+            yield chunk
+    
+    return StreamingResponse(chunks(), media_type="audio/mpeg")
+
 @app.post("/upload-audio", response_model=ApiResponse)
 async def upload_audio(file: UploadFile = File(...)):
     """
@@ -118,7 +168,7 @@ async def upload_audio(file: UploadFile = File(...)):
         audio_bytes = await file.read()
         
         # Process with the voice agent
-        result = voice_agent.speech_to_text(audio_bytes)
+        result = await voice_agent.speech_to_text(audio_bytes)
         
         if result["success"]:
             return {"success": True, "data": {"text": result["text"]}}
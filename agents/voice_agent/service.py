@@ -5,6 +5,7 @@ import os
 import base64
 from typing import Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
@@ -23,6 +24,9 @@ voice_agent = VoiceAgent(
 app = FastAPI(title="Voice Agent Service", 
               description="Speech-to-text and text-to-speech conversion agent")
 
+# Compress JSON responses, which carry base64 audio for text-to-speech
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Define request and response models
 class TextToSpeechRequest(BaseModel):
     text: str
@@ -46,7 +50,7 @@ async def speech_to_text_file(file: UploadFile = File(...)):
     """Convert speech to text from uploaded file."""
     try:
         audio_data = await file.read()
-        result = voice_agent.speech_to_text(audio_data)
+        result = await voice_agent.speech_to_text(audio_data)
         
         if result["success"]:
             return {"success": True, "data": result}
@@ -62,7 +66,7 @@ async def speech_to_text_file(file: UploadFile = File(...)):
 async def speech_to_text_base64(request: Base64AudioRequest):
     """Convert speech to text from base64 encoded audio."""
     try:
-        result = voice_agent.speech_to_text(request.audio_data)
+        result = await voice_agent.speech_to_text(request.audio_data)
         
         if result["success"]:
             return {"success": True, "data": result}
@@ -78,7 +82,7 @@ async def speech_to_text_base64(request: Base64AudioRequest):
 async def text_to_speech(request: TextToSpeechRequest):
     """Convert text to speech."""
     try:
-        result = voice_agent.text_to_speech(request.text, request.voice)
+        result = await voice_agent.text_to_speech(request.text, request.voice)
         
         if result["success"]:
             return {"success": True, "data": result}
@@ -95,7 +99,7 @@ async def process_voice_query(file: UploadFile = File(...)):
     """Process a voice query from uploaded file."""
     try:
         audio_data = await file.read()
-        result = voice_agent.process_voice_query(audio_data)
+        result = await voice_agent.process_voice_query(audio_data)
         
         if result["success"]:
             return {"success": True, "data": result}
@@ -111,7 +115,7 @@ async def process_voice_query(file: UploadFile = File(...)):
 async def process_voice_query_base64(request: Base64AudioRequest):
     """Process a voice query from base64 encoded audio."""
     try:
-        result = voice_agent.process_voice_query(request.audio_data)
+        result = await voice_agent.process_voice_query(request.audio_data)
         
         if result["success"]:
             return {"success": True, "data": result}
@@ -127,7 +131,7 @@ async def process_voice_query_base64(request: Base64AudioRequest):
 async def generate_voice_response(request: TextToSpeechRequest):
     """Generate a voice response from text."""
     try:
-        result = voice_agent.generate_voice_response(request.text, request.voice)
+        result = await voice_agent.generate_voice_response(request.text, request.voice)
         
         if result["success"]:
             return {"success": True, "data": result}
@@ -4,12 +4,13 @@ Initialize the vector database for the Finance Voice Agent.
 import os
 import logging
 import json
-from typing import Dict, List, Any
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
-import pandas as pd
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,8 +19,127 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-def initialize_vector_db():
-    """Initialize the vector database."""
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64
+
+# The retriever turns L2 distances into confidences with 1 / (1 + d), so
+# every local index type keeps the L2 metric
+FAISS_METRIC = "l2"
+
+# HNSW graph parameters: links per node and search breadth
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# IVFPQ parameters: inverted lists, PQ sub-quantizers and bits per code, and
+# lists visited per query. FAISS wants about 39 training points per list.
+IVFPQ_NLIST = 1024
+IVFPQ_M = 16
+IVFPQ_NBITS = 8
+IVFPQ_NPROBE = 16
+IVF_MIN_POINTS_PER_LIST = 39
+
+# Index types that must be trained on sample vectors before use
+TRAINED_INDEX_TYPES = ("sq8", "ivfpq")
+
+# Scalar quantizer used by each compressed index type, recorded in the
+# metadata so readers decode vectors the same way
+SCALAR_QUANTIZERS = {
+    "hnsw_fp16": "QT_fp16",
+    "sq8": "QT_8bit",
+}
+
+def create_faiss_index(dimension: int, index_type: str = "hnsw",
+                       train_vectors: np.ndarray = None) -> faiss.Index:
+    """
+    Create an empty FAISS index.
+    
+    HNSW gives sub-linear search as the corpus grows and, unlike IVF or PQ
+    indexes, needs no training data, so it can be created empty. The
+    "hnsw_fp16" variant stores vectors as 16-bit floats, halving the memory
+    read per query. "sq8" stores each component as an 8-bit integer scaled
+    to the range seen in the training vectors, a 4x saving over float32
+    that FAISS scores with SIMD integer kernels. "ivfpq" compresses each
+    vector to IVFPQ_M bytes and only scans the closest inverted lists, but
+    must be trained on a sample of the corpus. All index types use L2
+    distance.
+    
+    Args:
+        dimension: Embedding dimension
+        index_type: "hnsw", "hnsw_fp16", "sq8", "ivfpq" or "flat" (exact search)
+        train_vectors: Sample vectors, required for "sq8" and "ivfpq"
+        
+    Returns:
+        FAISS index
+    """
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dimension)
+    if index_type in ("hnsw", "hnsw_fp16"):
+        if index_type == "hnsw_fp16":
+            qtype = getattr(faiss.ScalarQuantizer, SCALAR_QUANTIZERS[index_type])
+            index = faiss.IndexHNSWSQ(dimension, qtype, HNSW_M)
+        else:
+            index = faiss.IndexHNSWFlat(dimension, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+    if index_type == "sq8":
+        if train_vectors is None or len(train_vectors) == 0:
+            raise ValueError("sq8 index needs training vectors")
+        
+        qtype = getattr(faiss.ScalarQuantizer, SCALAR_QUANTIZERS[index_type])
+        index = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_L2)
+        index.train(np.ascontiguousarray(train_vectors, dtype=np.float32))
+        return index
+    if index_type == "ivfpq":
+        min_train = 2 ** IVFPQ_NBITS
+        if train_vectors is None or len(train_vectors) < min_train:
+            raise ValueError(f"ivfpq index needs at least {min_train} training vectors")
+        
+        # Use fewer lists for small corpora so each one is trained on enough points
+        nlist = min(IVFPQ_NLIST, max(1, len(train_vectors) // IVF_MIN_POINTS_PER_LIST))
+        quantizer = faiss.IndexFlatL2(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, IVFPQ_M, IVFPQ_NBITS)
+        index.train(np.ascontiguousarray(train_vectors, dtype=np.float32))
+        index.nprobe = IVFPQ_NPROBE
+        return index
+    raise ValueError(f"Unknown FAISS index type: {index_type}")
+
+@lru_cache(maxsize=1)
+def get_embedding_model() -> SentenceTransformer:
+    """Load the embedding model once per process and reuse it."""
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+def embed_documents(documents: List[str]) -> np.ndarray:
+    """
+    Encode documents in batches as float32 vectors.
+    
+    Args:
+        documents: Texts to embed
+        
+    Returns:
+        Array of shape (len(documents), dimension)
+    """
+    embeddings = get_embedding_model().encode(
+        documents,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+def initialize_vector_db(documents: Optional[List[str]] = None):
+    """
+    Initialize the vector database.
+    
+    The local FAISS index is written empty. The retriever owns the document
+    records and the mapping from index rows to chunks, so documents are added
+    through RetrieverAgent.add_document. Index types that need training are
+    trained on the given documents.
+    
+    Args:
+        documents: Optional sample texts to train an "sq8" or "ivfpq" index on
+    """
     logger.info("Initializing vector database...")
     
     # Check if Pinecone API key is available
@@ -40,9 +160,7 @@ def initialize_vector_db():
                 logger.info(f"Creating Pinecone index: {vector_index_name}")
                 
                 # Get embedding dimension
-                embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-                dummy_embedding = embedding_model.encode(["test"])[0]
-                dimension = len(dummy_embedding)
+                dimension = get_embedding_model().get_sentence_embedding_dimension()
                 
                 # Create index
                 pinecone.create_index(
@@ -68,12 +186,16 @@ def initialize_vector_db():
         os.makedirs("data", exist_ok=True)
         
         # Get embedding dimension
-        embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-        dummy_embedding = embedding_model.encode(["test"])[0]
-        dimension = len(dummy_embedding)
+        dimension = get_embedding_model().get_sentence_embedding_dimension()
+        
+        # Embed the training sample in one batched pass if the index needs one
+        index_type = os.getenv("FAISS_INDEX_TYPE", "hnsw")
+        train_vectors = None
+        if documents and index_type in TRAINED_INDEX_TYPES:
+            train_vectors = embed_documents(documents)
         
         # Create FAISS index
-        index = faiss.IndexFlatL2(dimension)
+        index = create_faiss_index(dimension, index_type, train_vectors=train_vectors)
         
         # Save empty index
         faiss.write_index(index, "data/finance_vector_index.faiss")
@@ -82,12 +204,15 @@ def initialize_vector_db():
         with open("data/finance_vector_metadata.json", "w") as f:
             json.dump({
                 "dimension": dimension,
-                "model": "all-MiniLM-L6-v2",
+                "model": EMBEDDING_MODEL_NAME,
+                "index_type": index_type,
+                "metric": FAISS_METRIC,
+                "quantizer": SCALAR_QUANTIZERS.get(index_type),
                 "documents": [],
-                "created_at": pd.Timestamp.now().isoformat()
+                "created_at": datetime.now(timezone.utc).isoformat()
             }, f)
         
-        logger.info(f"Local FAISS index created with dimension {dimension}")
+        logger.info(f"Local FAISS {index_type} index created with dimension {dimension}")
         return {"success": True, "db_type": "faiss", "index_path": "data/finance_vector_index.faiss"}
         
     except Exception as e: